@@ -12,8 +12,10 @@
 
 # You should have received a copy of the GNU General Public License along
 # with Predicate Wars. If not, see <https://www.gnu.org/licenses/>.
+import codecs
 from dataclasses import dataclass
-from typing import List
+import os
+from typing import IO, Dict, Iterable, Iterator, List, Tuple
 import re
 
 def _countRepeatedChars(text: str, target: str) -> int:
@@ -28,27 +30,131 @@ def _countRepeatedChars(text: str, target: str) -> int:
 @dataclass
 class BRulesParseResult:
     statement: str
-    titles: List[str] #Empty for now
+    titles: List[str] #Titles of enclosing sections, outermost first
+    start: Tuple[int, int] | None = None #1-based (line, column) of opening ~
+    end: Tuple[int, int] | None = None #1-based (line, column) of closing ~
+
+_delimiterRegex = re.compile(r'[~>]')
+
+def _iterChunks(source: str | bytes | IO, chunkSize: int) -> Iterator[str]:
+    """
+    Yields text of the source in chunks.
+    Bytes-like sources (including mmap) and binary files are decoded as UTF-8.
+    """
+    if isinstance(source, str):
+        yield source
+        return
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    if hasattr(source, 'read') and not hasattr(source, '__getitem__'):
+        while True:
+            chunk = source.read(chunkSize)
+            if not chunk:
+                break
+            yield chunk if isinstance(chunk, str) else decoder.decode(chunk)
+    else:
+        for start in range(0, len(source), chunkSize):
+            yield decoder.decode(source[start:start + chunkSize])
+    yield decoder.decode(b'', final=True)
+
+def _countLines(chunk: str, start: int, end: int, offset: int, line: int, lineStart: int) -> Tuple[int, int]:
+    """
+    Returns line number and text offset of line start after the chunk[start:end] segment.
+    offset is text offset of the chunk.
+    """
+    newlines = chunk.count('\n', start, end)
+    if newlines:
+        return line + newlines, offset + chunk.rfind('\n', start, end) + 1
+    return line, lineStart
+
+def _pushTitle(titles: List[Tuple[int, str]], text: str) -> None:
+    """
+    Enters the section of the title text following its first >, leaving sections of same or lower level.
+    """
+    name = text.lstrip('>')
+    level = 1 + len(text) - len(name)
+    while titles and titles[-1][0] <= level:
+        titles.pop()
+    titles.append((level, name.strip()))
+
+def iterParse(source: str | bytes | IO, chunkSize: int = 65536) -> Iterator[BRulesParseResult]:
+    """
+    Yields ~...~ delimited statements of the source one by one in a single pass,
+    with titles of their sections and positions of their delimiters.
+    A title runs from > to end of line, more >s mark an outer section (>>Section, >Subsection).
+    The source can be a string, bytes-like object, mmap or file object, read chunkSize at a time.
+    """
+    inStatement = False
+    inTitle = False
+    parts = []
+    titles = []
+    line, lineStart, offset = 1, 0, 0
+    start = None
+    for chunk in _iterChunks(source, chunkSize):
+        pos = 0
+        while pos < len(chunk):
+            if inStatement:
+                end = chunk.find('~', pos)
+                if end == -1:
+                    parts.append(chunk[pos:])
+                    line, lineStart = _countLines(chunk, pos, len(chunk), offset, line, lineStart)
+                    break
+                parts.append(chunk[pos:end])
+                line, lineStart = _countLines(chunk, pos, end, offset, line, lineStart)
+                yield BRulesParseResult(
+                    ''.join(parts),
+                    [title for _, title in titles],
+                    start,
+                    (line, offset + end - lineStart + 1)
+                )
+                parts = []
+                inStatement = False
+                pos = end + 1
+            elif inTitle:
+                end = chunk.find('\n', pos)
+                if end == -1:
+                    parts.append(chunk[pos:])
+                    break
+                parts.append(chunk[pos:end])
+                _pushTitle(titles, ''.join(parts))
+                parts = []
+                inTitle = False
+                pos = end
+            else:
+                delimiter = _delimiterRegex.search(chunk, pos)
+                if delimiter is None:
+                    line, lineStart = _countLines(chunk, pos, len(chunk), offset, line, lineStart)
+                    break
+                line, lineStart = _countLines(chunk, pos, delimiter.start(), offset, line, lineStart)
+                if delimiter.group() == '~':
+                    inStatement = True
+                    start = (line, offset + delimiter.start() - lineStart + 1)
+                else:
+                    inTitle = True
+                pos = delimiter.end()
+        offset += len(chunk)
 
 def parse(text: str) -> List[BRulesParseResult]:
-    rules = []
-    remaining = text
-    while remaining:
-        stateSearch = re.search(r'~(.*?)~', remaining, re.MULTILINE | re.DOTALL)
-        titleSearch = re.search(r'>+.*', remaining, re.MULTILINE)
-        if titleSearch and (not stateSearch or (titleSearch.start() < stateSearch.start())):
-            ... #Just in case when we need titles
-            remaining = remaining[titleSearch.end():]
-        elif stateSearch:
-            statement = stateSearch.group(1)
-            rules.append(BRulesParseResult(statement, []))
-            remaining = remaining[stateSearch.end():]
-        else:
-            break
-    return rules
+    return list(iterParse(text))
+
+def indexSections(results: Iterable[BRulesParseResult]) -> Dict[Tuple[str, ...], List[BRulesParseResult]]:
+    """
+    Returns results by title path of each section enclosing them, so outer sections include their subsections.
+    """
+    index = {}
+    for result in results:
+        for depth in range(len(result.titles) + 1):
+            index.setdefault(tuple(result.titles[:depth]), []).append(result)
+    return index
+
+defaultBaseRulesPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baserules.txt')
+
+def getBaseRulesPath() -> str:
+    """
+    Returns path of the base rule file, PWARS_BASERULES if set, else the file next to this module.
+    """
+    return os.environ.get('PWARS_BASERULES') or defaultBaseRulesPath
 
-def getBaseRules():
-    with open('baserules.txt', 'r', encoding='utf-8') as f:
-        text = f.read()
-        results = parse(text)
+def getBaseRules(path: str | None = None) -> List[BRulesParseResult]:
+    with open(getBaseRulesPath() if path is None else path, 'r', encoding='utf-8') as f:
+        results = list(iterParse(f))
     return results
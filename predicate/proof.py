@@ -20,11 +20,32 @@ from dataclasses import dataclass, field
 from enum import Enum
 from itertools import combinations
 import random
-from typing import Any, List, Optional, Set, Tuple
+from typing import IO, Any, List, Optional, Set, Tuple
 
-from predicate.statement import Statement, baseRules, predFuncSymbols
+from predicate.statement import Statement, StatementBuilder, StatementForm, baseRules, predFuncSymbols
 from predicate.utils import doOperator, smallestMissingInteger
 
+#Statement forms used by inference, compiled once
+forallStart = (('bracket', '('), ('quanti', 'forall'), ('bracket', '('), ('var', '0'), ('bracket', ')'))
+notForm = StatementForm((('bracket', '('), ('connect', 'not')), (('bracket', ')'),))
+implyForm = StatementForm((('bracket', '('),), (('bracket', ')'),), (('connect', 'imply'),))
+andForm = StatementForm((('bracket', '('),), (('bracket', ')'),), (('connect', 'and'),))
+equalForm = StatementForm((('bracket', '('),), (('bracket', ')'),), (('equal',),), opt1obj=True, opt2obj=True)
+forallForm = StatementForm(forallStart, (('bracket', ')'),))
+existsForm = StatementForm(
+    (('bracket', '('), ('quanti', 'exists'), ('bracket', '('), ('var', '0'), ('bracket', ')')),
+    (('bracket', ')'),)
+)
+forallImplyForm = StatementForm(
+    forallStart + (('bracket', '('),),
+    (('bracket', ')'), ('bracket', ')')),
+    (('connect', 'imply'),)
+)
+forallNotForm = StatementForm(
+    forallStart + (('bracket', '('), ('connect', 'not')),
+    (('bracket', ')'), ('bracket', ')'))
+)
+
 class StateTag(Enum):
     AXIOM = 0
     LEMMA = 1
@@ -115,13 +136,17 @@ class ProofBase:
         """
         if inferences is None:
             inferences = []
-        states = [Statement.lex(state) for state in strAxioms]
+        states = [state.intern() for state in Statement.lexMany(strAxioms)]
+        objects = Statement.lexMany(object for _, _, _, object, _ in inferences)
+        conclusions = iter(Statement.lexMany(
+            conclusionI for *_, conclusionI in inferences if isinstance(conclusionI, str)
+        ))
         proof = ProofBase(states, [StateTag.AXIOM for _ in states], [None for _ in states])
-        for index, (_, premise1Index, premise2Index, object, conclusionI) in enumerate(inferences):
+        for index, (_, premise1Index, premise2Index, _, conclusionI) in enumerate(inferences):
             if isinstance(conclusionI, int):
-                proof = proof.infer(premise1Index, premise2Index, Statement.lex(object), conclusionI)
+                proof = proof.infer(premise1Index, premise2Index, objects[index], conclusionI)
             elif isinstance(conclusionI, str):
-                proof = proof.infer(premise1Index, premise2Index, Statement.lex(object), Statement.lex(conclusionI))
+                proof = proof.infer(premise1Index, premise2Index, objects[index], next(conclusions))
             else:
                 raise TypeError(
                     f'''ProofBase.convert only supports conclusionI param types of int and str, your type is: {str(type(conclusionI))} at index {str(index)}'''
@@ -146,7 +171,26 @@ class ProofBase:
         """
         Returns vars and preds used in proof.
         """
-        return {sym for state in self.statements for sym in state.syms()}
+        return {sym for state in self.statements for sym in state.symbolPositions()}
+
+    def canonical(self, names: dict[Tuple, Tuple] | None = None) -> Tuple:
+        """
+        Returns the alpha-normal form of the statements and tags, renaming symbols consistently across statements.
+        Proofs equal up to renaming have equal forms, so they can be deduplicated with dicts and sets.
+        """
+        if names is None: names = {}
+        return (tuple(state.canonical(names) for state in self.statements), tuple(self.stateTags))
+
+    def write(self, file: IO[str], indent: str = '') -> None:
+        """
+        Writes statements of the proof to a file-like object, one numbered line each.
+        """
+        for index, state in enumerate(self.statements):
+            file.write(indent)
+            file.write(str(index))
+            file.write('. ')
+            file.write(str(state))
+            file.write('\n')
 
     def subProof(self) -> Set[Tuple]:
         """
@@ -165,7 +209,7 @@ class ProofBase:
             sym
             for state in
             (state for index, state in enumerate(self.statements) if index != stateIndex)
-            for sym in state.syms()
+            for sym in state.symbolPositions()
         }
 
     def unusedVarSuggester(self, randomClass = random):
@@ -215,103 +259,43 @@ class ProofBase:
         match inferType:
             case InferType.ImpliInst:
                 A = premise1
-                try: notA = premise1.formulasInForm(
-                    (
-                        ('bracket', '('),
-                        ('connect', 'not'),
-                    ),
-                    (
-                        ('bracket', ')'),
-                    ),
-                )[0][0]
+                try: notA = notForm.match(premise1)[0]
                 except TypeError: notA = None
                 B = premise2
-                try: notB = premise2.formulasInForm(
-                    (
-                        ('bracket', '('),
-                        ('connect', 'not'),
-                    ),
-                    (
-                        ('bracket', ')'),
-                    ),
-                )[0][0]
+                try: notB = notForm.match(premise2)[0]
                 except TypeError: notB = None
                 if notA:
                     if notB:
                         conclusions.append(
-                            Statement( (('bracket', '('),) ) + \
-                            notA + \
-                            Statement( (('connect', 'imply'),) ) + \
-                            notB + \
-                            Statement( (('bracket', ')'),) )
+                            StatementBuilder().open().add(notA).connect('imply').add(notB).close().build()
                         )
                     conclusions.append(
-                        Statement( (('bracket', '('),) ) + \
-                        notA + \
-                        Statement( (('connect', 'imply'),) ) + \
-                        B + \
-                        Statement( (('bracket', ')'),) )
+                        StatementBuilder().open().add(notA).connect('imply').add(B).close().build()
                     )
                 conclusions.append(
-                    Statement( (('bracket', '('),) ) + \
-                    A + \
-                    Statement( (('connect', 'imply'),) ) + \
-                    B + \
-                    Statement( (('bracket', ')'),) )
+                    StatementBuilder().open().add(A).connect('imply').add(B).close().build()
                 )
             case InferType.ExpliInst:
                 A = premise1
-                try: notB = premise2.formulasInForm(
-                    (
-                        ('bracket', '('),
-                        ('connect', 'not'),
-                    ),
-                    (
-                        ('bracket', ')'),
-                    ),
-                )[0][0]
+                try: notB = notForm.match(premise2)[0]
                 except TypeError: notB = None
                 if notB:
                     conclusions.append(
-                        Statement( (('bracket', '('), ('connect', 'not'), ('bracket', '(')) ) + \
-                        A + \
-                        Statement( (('connect', 'imply'),) ) + \
-                        notB + \
-                        Statement( (('bracket', ')'), ('bracket', ')')) )
+                        StatementBuilder().open().connect('not').open().add(A) \
+                        .connect('imply').add(notB).close(2).build()
                     )
             case InferType.ModPonens:
                 A = premise2
-                try: Bb = premise1.formulasInForm(
-                    (
-                        ('bracket', '('),
-                    ),
-                    (
-                        ('bracket', ')'),
-                    ),
-                    (
-                        ('connect', 'imply'),
-                    ),
-                )[0]
+                try: Bb = implyForm.match(premise1)
                 except TypeError: Bb = None
                 if Bb and tuple(Bb[0]) == tuple(A): conclusions.append(Bb[1])
             case InferType.UniversalInst:
-                try: A = premise1.formulasInForm(
-                    (
-                        ('bracket', '('),
-                        ('quanti', 'forall'),
-                        ('bracket', '('),
-                        ('var', '0'),
-                        ('bracket', ')'),
-                    ),
-                    (
-                        ('bracket', ')'),
-                    ),
-                )[0][0]
+                try: A = forallForm.match(premise1)[0]
                 except TypeError: pass
                 else:
                     if object.wellformedobj():
                         thatVar = premise1[3]
-                        conclusions.append(A.complexSubstitute({thatVar: tuple(object)}))
+                        conclusions.append(A.instantiate(thatVar, object))
                     else:
                         raise InferenceError('Object must be well formed')
             case InferType.UniversalGenr:
@@ -320,350 +304,135 @@ class ProofBase:
                 object[0] not in self.symsWithout(premise1Index):
                     uniqueVars1 = (object[0], self.unusedVarSuggester())
                     for uniqueVar in uniqueVars1:
-                        conclusions.append(Statement( (
-                            ('bracket', '('),
-                            ('quanti', 'forall'),
-                            ('bracket', '('),
-                            uniqueVar,
-                            ('bracket', ')'),
-                        ) ) + premise1 + Statement( (
-                            ('bracket', ')'),
-                        ) ))
-            case InferType.UniversalGenrWRef:
-                if premise2.form(
-                        (
-                            ('bracket', '('),
-                            ('quanti', 'forall'),
-                            ('bracket', '('),
-                            ('var', '0'),
-                            ('bracket', ')'),
-                        ), (
-                            ('bracket', ')'),
+                        conclusions.append(
+                            StatementBuilder().quanti('forall', uniqueVar).add(premise1).close().build()
                         )
-                    ):
+            case InferType.UniversalGenrWRef:
+                if forallForm.fits(premise2):
                     x = premise2[3]
-                    conclusions.append(Statement( (
-                        ('bracket', '('),
-                        ('quanti', 'forall'),
-                        ('bracket', '('),
-                        x,
-                        ('bracket', ')'),
-                    ) ) + premise1 + Statement( (
-                        ('bracket', ')'),
-                    ) ))
+                    conclusions.append(
+                        StatementBuilder().quanti('forall', x).add(premise1).close().build()
+                    )
             case InferType.ExistentialInst:
-                try: A = premise1.formulasInForm(
-                    (
-                        ('bracket', '('),
-                        ('quanti', 'exists'),
-                        ('bracket', '('),
-                        ('var', '0'),
-                        ('bracket', ')'),
-                    ),
-                    (
-                        ('bracket', ')'),
-                    ),
-                )[0][0]
+                try: A = existsForm.match(premise1)[0]
                 except TypeError: A = None
                 if A:
                     conclusions.append(A)
             case InferType.ExistentialGenr:
-                for var in (sym for sym in premise1.syms() if 'ar' in sym[0]):
+                for var in (sym for sym in premise1.symbolPositions() if 'ar' in sym[0]):
                     conclusions.append(
-                        Statement((
-                            ('bracket', '('),
-                            ('quanti', 'exists'),
-                            ('bracket', '('),
-                            var,
-                            ('bracket', ')'),
-                        )) + premise1 + Statement((
-                            ('bracket', ')'),
-                        ))
+                        StatementBuilder().quanti('exists', var).add(premise1).close().build()
                     )
             case InferType.Conjunc:
                 conclusions.append(
-                    Statement((
-                        ('bracket', '('),
-                    )) + premise1 + Statement((
-                        ('connect', 'and'),
-                    )) + premise2 + Statement((
-                        ('bracket', ')'),
-                    ))
+                    StatementBuilder().open().add(premise1).connect('and').add(premise2).close().build()
                 )
             case InferType.Simplific:
-                try: A, B = premise1.formulasInForm(
-                    (('bracket', '('),),
-                    (('bracket', ')'),),
-                    (('connect', 'and'),),
-                )[0]
+                try: A, B = andForm.match(premise1)
                 except TypeError: A, B = (None, None)
                 if A and B:
                     conclusions.append(A)
                     conclusions.append(B)
             case InferType.FalsyAND:
-                try: A = premise1.formulasInForm(
-                    (('bracket', '('),
-                     ('connect', 'not')),
-                    (('bracket', ')'),),
-                )[0][0]
+                try: A = notForm.match(premise1)[0]
                 except TypeError: A = None
                 if A:
                     for B in self.statements:
                         conclusions.append(
-                            Statement((
-                                ('bracket', '('),
-                                ('connect', 'not'),
-                                ('bracket', '(')
-                            )) +
-                            A +
-                            Statement((
-                                ('connect', 'and'),
-                            )) +
-                            B +
-                            Statement((
-                                ('bracket', ')'),
-                                ('bracket', ')'),
-                            ))
+                            StatementBuilder().open().connect('not').open().add(A) \
+                            .connect('and').add(B).close(2).build()
                         )
                         conclusions.append(
-                            Statement((
-                                ('bracket', '('),
-                                ('connect', 'not'),
-                                ('bracket', '(')
-                            )) +
-                            A +
-                            Statement((
-                                ('connect', 'and'),
-                                ('bracket', '('),
-                                ('connect', 'not'),
-                            )) +
-                            B +
-                            Statement((
-                                ('bracket', ')'),
-                                ('bracket', ')'),
-                                ('bracket', ')'),
-                            ))
+                            StatementBuilder().open().connect('not').open().add(A) \
+                            .connect('and').open().connect('not').add(B).close(3).build()
                         )
             case InferType.Addition:
                 for premise2 in self.statements:
                     conclusions.append(
-                        Statement((
-                            ('bracket', '('),
-                        )) +
-                        premise1 +
-                        Statement((
-                            ('connect', 'or'),
-                        )) +
-                        premise2 +
-                        Statement((
-                            ('bracket', ')'),
-                        ))
+                        StatementBuilder().open().add(premise1).connect('or').add(premise2).close().build()
                     )
                     conclusions.append(
-                        Statement((
-                            ('bracket', '('),
-                        )) +
-                        premise1 +
-                        Statement((
-                            ('connect', 'or'),
-                            ('bracket', '('),
-                            ('connect', 'not'),
-                        )) +
-                        premise2 +
-                        Statement((
-                            ('bracket', ')'),
-                            ('bracket', ')'),
-                        ))
+                        StatementBuilder().open().add(premise1) \
+                        .connect('or').open().connect('not').add(premise2).close(2).build()
                     )
             case InferType.FalsyOR:
-                try: A = premise1.formulasInForm(
-                    (('bracket', '('),
-                     ('connect', 'not')),
-                    (('bracket', ')'),),
-                )[0][0]
+                try: A = notForm.match(premise1)[0]
                 except TypeError: A = None
-                try: B = premise2.formulasInForm(
-                    (('bracket', '('),
-                     ('connect', 'not')),
-                    (('bracket', ')'),),
-                )[0][0]
+                try: B = notForm.match(premise2)[0]
                 except TypeError: B = None
                 if A and B:
                     conclusions.append(
-                        Statement((
-                            ('bracket', '('),
-                            ('connect', 'not'),
-                            ('bracket', '(')
-                        )) +
-                        A +
-                        Statement((
-                            ('connect', 'or'),
-                        )) +
-                        B +
-                        Statement((
-                            ('bracket', ')'),
-                            ('bracket', ')'),
-                        ))
+                        StatementBuilder().open().connect('not').open().add(A) \
+                        .connect('or').add(B).close(2).build()
                     )
             case InferType.UnivModPonens:
-                try: Ax, Bx = premise1.formulasInForm((
-                    ('bracket', '('),
-                    ('quanti', 'forall'),
-                    ('bracket', '('),
-                    ('var', '0'),
-                    ('bracket', ')'),
-                    ('bracket', '('),
-                ), (
-                    ('bracket', ')'),
-                    ('bracket', ')'),
-                ), (
-                    ('connect', 'imply'),
-                ),)[0]
+                try: Ax, Bx = forallImplyForm.match(premise1)
                 except TypeError: Ax, Bx = (None, None)
                 if Ax and Bx:
                     assert premise1[3][0] in ['var', 'distVar'], 'brah'
                     bol, maps = Ax.eq(premise2)
                     x = premise1[3]
-                    if bol and x in Ax.syms():
+                    if bol and x in Ax.symbolPositions():
                         y = maps[x]
                         conclusions.append(Bx.substitute({x: y}))
             case InferType.ExistModPonens:
-                try: Ax = premise1.formulasInForm((
-                    ('bracket', '('),
-                    ('quanti', 'exists'),
-                    ('bracket', '('),
-                    ('var', '0'),
-                    ('bracket', ')'),
-                ), (
-                    ('bracket', ')'),
-                ),)[0][0]
+                try: Ax = existsForm.match(premise1)[0]
                 except TypeError: Ax = None
                 else:
                     x = premise1[3]
-                    try: Ay, By = premise2.formulasInForm((
-                        ('bracket', '('),
-                    ), (
-                        ('bracket', ')'),
-                    ), (
-                        ('connect', 'imply'),
-                    ),)[0]
+                    try: Ay, By = implyForm.match(premise2)
                     except TypeError: Ay, By = (None, None)
                     else:
                         bol, maps = Ax.eq(Ay)
                         if bol:
                             y = maps[x]
                             for z in (
-                                sym for sym in self.syms() - By.syms()
-                                if sym[0] in ['var', 'distVar']
+                                sym for sym in self.syms()
+                                if sym[0] in ['var', 'distVar'] and sym not in By.symbolPositions()
                             ):
                                 conclusions.append(
-                                    Statement.lex('(exists(') +
-                                    Statement((z,)) +
-                                    Statement.lex(')') +
-                                    By.substitute({y: z}) +
-                                    Statement.lex(')')
+                                    StatementBuilder().quanti('exists', z).add(By.substitute({y: z})).close().build()
                                 )
                             conclusions.append(
-                                Statement.lex('(exists(') +
-                                Statement((y,)) +
-                                Statement.lex(')') +
-                                By +
-                                Statement.lex(')')
+                                StatementBuilder().quanti('exists', y).add(By).close().build()
                             )
             case InferType.SubsProp:
-                try: A = premise1.formulasInForm((
-                    ('bracket', '('),
-                    ('quanti', 'forall'),
-                    ('bracket', '('),
-                    ('var', '0'),
-                    ('bracket', ')'),
-                ), (
-                    ('bracket', ')'),
-                ))[0][0]
+                try: A = forallForm.match(premise1)[0]
                 except TypeError: pass
                 else:
                     x = premise1[3]
-                    res = A.complexSubstitute({x: tuple(object)})
+                    res = A.instantiate(x, object)
                     if res: conclusions.append(res)
             case InferType.Identity:
                 conclusions.append(
-                    Statement.lex('(') +
-                    object +
-                    Statement.lex('=') +
-                    object +
-                    Statement.lex(')')
+                    StatementBuilder().open().add(object, ('equal',), object).close().build()
                 )
             case InferType.SymmProp:
-                try: X, Y = premise1.formulasInForm((
-                    ('bracket', '('),
-                ), (
-                    ('bracket', ')'),
-                ), (
-                    ('equal',),
-                ),
-                opt1obj=True,
-                opt2obj=True,
-                )[0]
+                try: X, Y = equalForm.match(premise1)
                 except TypeError: pass
                 else:
                     conclusions.append(
-                        Statement.lex('(') +
-                        Y +
-                        Statement.lex('=') +
-                        X +
-                        Statement.lex(')')
+                        StatementBuilder().open().add(Y, ('equal',), X).close().build()
                     )
             case InferType.TransProp:
-                try: X, Y = premise1.formulasInForm((
-                    ('bracket', '('),
-                ), (
-                    ('bracket', ')'),
-                ), (
-                    ('equal',),
-                ),
-                opt1obj=True,
-                opt2obj=True,
-                )[0]
+                try: X, Y = equalForm.match(premise1)
                 except TypeError: pass
                 else:
-                    try: Y2, Z = premise2.formulasInForm((
-                        ('bracket', '('),
-                    ), (
-                        ('bracket', ')'),
-                    ), (
-                        ('equal',),
-                    ),
-                    opt1obj=True,
-                    opt2obj=True,
-                    )[0]
+                    try: Y2, Z = equalForm.match(premise2)
                     except TypeError: pass
                     else:
                         if tuple(Y2) == tuple(Y):
                             conclusions.append(
-                                Statement.lex('(') +
-                                X +
-                                Statement.lex('=') +
-                                Z +
-                                Statement.lex(')')
+                                StatementBuilder().open().add(X, ('equal',), Z).close().build()
                             )
             case InferType.SubsPropEq:
-                try: x, y = premise1.formulasInForm((('bracket', '('),), (('bracket', ')'),), (('equal',),),
-                    opt1obj=True,
-                    opt2obj=True,
-                )[0]
+                try: x, y = equalForm.match(premise1)
                 except TypeError: pass
                 else:
                     if len(object) == 1:
                         conclusions.append(
-                            Statement.lex('(') +
-                            object +
-                            Statement.lex('(') +
-                            x +
-                            Statement.lex(') = ') +
-                            object +
-                            Statement.lex('(') +
-                            y +
-                            Statement.lex('))')
+                            StatementBuilder().open().add(object).open().add(x).close() \
+                            .add(('equal',), object).open().add(y).close(2).build()
                         )
             case InferType.OpSimplify: #Holy complexity (reduced)
                 occurences = (
@@ -683,15 +452,15 @@ class ProofBase:
                     resOp = doOperator(num1, num2, connect)
 
                     if resOp is not None:
-                        res = list(premise1.statement)
-                        res[start:end] = (('number', resOp),)
-                        conclusions.append(Statement(res))
+                        conclusions.append(
+                            StatementBuilder(premise1[:start], ('number', resOp), premise1[end:]).build()
+                        )
                     else: raise InferenceError('Wrong operator; impossible.')
             case InferType.FuncSimplify:
                 for start, end in premise1.matchingParentheses():
                     if start == 0 or premise1[start - 1][0] not in predFuncSymbols:
                         continue
-                    func = Statement(premise1[start - 1 : end + 1])
+                    func = premise1.view(start - 1, end + 1)
                     args = func.functionArgs()
                     assert args is not None, 'Impossible error.'
                     if any(len(tuple(arg)) != 1 for arg in args):
@@ -702,9 +471,9 @@ class ProofBase:
                     )
                     if calc is None:
                         continue
-                    res = deepcopy(premise1)
-                    res[start - 1 : end + 1] = calc
-                    conclusions.append(res)
+                    conclusions.append(
+                        StatementBuilder(premise1[:start - 1], calc, premise1[end + 1:]).build()
+                    )
             case InferType.Comparison: #Holy complexity
                 occurences = \
                     (
@@ -723,17 +492,18 @@ class ProofBase:
                 mapper = {True: 'tT', False: 'tF'}
                 for num1, num2, connect, start, end in occurences:
                     if connect == '>':
-                        res = list(premise1.statement)
-                        res[start:end] = (('truth', mapper[int(num1) > int(num2)],),)
-                        conclusions.append(Statement(tuple(res)))
+                        conclusions.append(StatementBuilder(
+                            premise1[:start], ('truth', mapper[int(num1) > int(num2)],), premise1[end:]
+                        ).build())
                         continue
                     elif connect == '<':
-                        res = list(premise1.statement)
-                        res[start:end] = (('truth', mapper[int(num1) < int(num2)],),)
-                        conclusions.append(Statement(tuple(res)))
+                        conclusions.append(StatementBuilder(
+                            premise1[:start], ('truth', mapper[int(num1) < int(num2)],), premise1[end:]
+                        ).build())
                         continue
             case InferType.RuleInclusion:
-                availableRules = filter(lambda rule: rule not in self.statements, baseRules)
+                existing = set(self.statements)
+                availableRules = filter(lambda rule: rule not in existing, baseRules)
                 conclusions.extend(availableRules)
             case _: raise InferenceError('Unsupported infer type: {}'.format(inferType))
 
@@ -800,9 +570,12 @@ class ProofBase:
             state, inferType = conclusions[conclusionI]
             res.inferences += [(inferType, premise1Index, premise2Index, object, conclusionI)]
         elif isinstance(conclusionI, Statement):
-            if tuple(conclusionI) not in tuple(tuple(state) for state, _ in conclusions):
+            conclusionIndexes = {}
+            for index, (state, _) in enumerate(conclusions):
+                conclusionIndexes.setdefault(state.statement, index)
+            if conclusionI.statement not in conclusionIndexes:
                 raise InferenceError('Invalid conclusion')
-            conclusionIndex = tuple(tuple(state) for state, _ in conclusions).index(tuple(conclusionI))
+            conclusionIndex = conclusionIndexes[conclusionI.statement]
             state, inferType = conclusions[conclusionIndex]
             res.inferences += [(inferType, premise1Index, premise2Index, object, conclusionIndex)]
         else:
@@ -810,7 +583,7 @@ class ProofBase:
                 f'''ProofBase.infer only supports conclusionI param types of int and Statement, your type is: {str(type(conclusionI))}'''
             )
         assert not isinstance(state, int), 'brah'
-        res.statements += [state]
+        res.statements += [state.intern()]
         res.stateTags += [StateTag.LEMMA]
         return res
     def symbolPoint(self) -> int:
@@ -858,25 +631,9 @@ class ProofBase:
         """
         pairs = combinations(self.statements, 2)
         for state1, state2 in pairs:
-            state1c = state1.formulasInForm(
-                (
-                    ('bracket', '('),
-                    ('connect', 'not'),
-                ),
-                (
-                    ('bracket', ')'),
-                ),
-            )
-            state2c = state2.formulasInForm(
-                (
-                    ('bracket', '('),
-                    ('connect', 'not'),
-                ),
-                (
-                    ('bracket', ')'),
-                ),
-            )
-            if (state2c and tuple(state1) == tuple(state2c[0][0])) or (state1c and tuple(state2) == tuple(state1c[0][0])):
+            state1c = notForm.match(state1)
+            state2c = notForm.match(state2)
+            if (state2c and tuple(state1) == tuple(state2c[0])) or (state1c and tuple(state2) == tuple(state1c[0])):
                 return True
         return False
 
@@ -894,7 +651,7 @@ class Proof(ProofBase):
                       Tuple[Tuple[ str, Tuple[Tuple[int, int | None, str, int | Statement], ...] ]]
                       = ()
                 ) -> 'Proof':
-        states = [Statement.lex(state) for state in strAxioms]
+        states = [state.intern() for state in Statement.lexMany(strAxioms)]
         proof = Proof(
             states,
             [StateTag.AXIOM for _ in states],
@@ -910,6 +667,24 @@ class Proof(ProofBase):
         )
         return proof
 
+    def canonical(self, names: dict[Tuple, Tuple] | None = None) -> Tuple:
+        """
+        Returns the alpha-normal form of the proof and its subproofs, renaming symbols consistently across them.
+        """
+        if names is None: names = {}
+        return super().canonical(names) + (tuple(subproof.canonical(names) for subproof in self.subproofs),)
+
+    def write(self, file: IO[str], indent: str = '') -> None:
+        """
+        Writes statements of the proof to a file-like object, one numbered line each,
+        followed by its subproofs indented.
+        """
+        super().write(file, indent)
+        for index, subproof in enumerate(self.subproofs):
+            file.write(indent)
+            file.write(f'Subproof {index}:\n')
+            subproof.write(file, indent + '    ')
+
     def inferConclusions(
                          self,
                          inferType: InferType,
@@ -953,42 +728,9 @@ class Proof(ProofBase):
         match inferType:
             case InferType.CondProof:
                 try:
-                    Ax = premise3.formulasInForm(
-                        (
-                            ('bracket', '('),
-                            ('quanti', 'forall'),
-                            ('bracket', '('),
-                            ('var', '0'),
-                            ('bracket', ')'),
-                        ),
-                        (
-                            ('bracket', ')'),
-                        ),
-                    )[0][0]
-                    Bx = premise4.formulasInForm(
-                        (
-                            ('bracket', '('),
-                            ('quanti', 'forall'),
-                            ('bracket', '('),
-                            ('var', '0'),
-                            ('bracket', ')'),
-                        ),
-                        (
-                            ('bracket', ')'),
-                        ),
-                    )[0][0]
-                    Ay = premise1.formulasInForm(
-                        (
-                            ('bracket', '('),
-                            ('quanti', 'forall'),
-                            ('bracket', '('),
-                            ('var', '0'),
-                            ('bracket', ')'),
-                        ),
-                        (
-                            ('bracket', ')'),
-                        ),
-                    )[0][0]
+                    Ax = forallForm.match(premise3)[0]
+                    Bx = forallForm.match(premise4)[0]
+                    Ay = forallForm.match(premise1)[0]
                 except TypeError: pass
                 else:
                     bol, _ = Ax.eq(Ay)
@@ -998,59 +740,16 @@ class Proof(ProofBase):
                         conclusions.append(premise4.substitute({x: y}))
             case InferType.IndProof:
                 try:
-                    Ax = premise3.formulasInForm(
-                        (
-                            ('bracket', '('),
-                            ('quanti', 'forall'),
-                            ('bracket', '('),
-                            ('var', '0'),
-                            ('bracket', ')'),
-                        ),
-                        (
-                            ('bracket', ')'),
-                        ),
-                    )[0][0]
-                    Bx = premise4.formulasInForm(
-                        (
-                            ('bracket', '('),
-                            ('quanti', 'forall'),
-                            ('bracket', '('),
-                            ('var', '0'),
-                            ('bracket', ')'),
-                        ),
-                        (
-                            ('bracket', ')'),
-                        ),
-                    )[0][0]
-                    Bx2 = premise5.formulasInForm(
-                        (
-                            ('bracket', '('),
-                            ('quanti', 'forall'),
-                            ('bracket', '('),
-                            ('var', '0'),
-                            ('bracket', ')'),
-                            ('bracket', '('),
-                            ('connect', 'not'),
-                        ),
-                        (
-                            ('bracket', ')'),
-                            ('bracket', ')'),
-                        ),
-                    )[0][0]
+                    Ax = forallForm.match(premise3)[0]
+                    Bx = forallForm.match(premise4)[0]
+                    Bx2 = forallNotForm.match(premise5)[0]
                 except TypeError: pass
                 else:
                     if Bx == Bx2 and len(tuple(object)) == 1:
                         x = premise4[3]
                         y = object[0]
                         conclusions.append(
-                            Statement.lex('(forall(')
-                            +
-                            Statement((y,))
-                            +
-                            Statement.lex(')(not ')
-                            +
-                            Ax.substitute({x: y})
-                            +
-                            Statement.lex('))')
+                            StatementBuilder().quanti('forall', y).open().connect('not') \
+                            .add(Ax.substitute({x: y})).close(2).build()
                         )
         return conclusions
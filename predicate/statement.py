@@ -15,13 +15,23 @@
 """
 Provides essential classes and methods for creating predicate logic statements.
 """
+from bisect import bisect_left
 from copy import deepcopy
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from enum import Enum
+from functools import lru_cache, partial
+import hashlib
+import marshal
+import os
 import re
-from typing import List, Set, Tuple
+import tempfile
+from types import MappingProxyType
+from typing import IO, Any, Callable, FrozenSet, Iterable, Iterator, List, Mapping, Sequence, Set, Tuple
+from weakref import WeakValueDictionary
 
-from baserules import getBaseRules
-from predicate.utils import checkSeqForm, mappableDict, seqFormOptionalsIndexes
+from baserules import BRulesParseResult, getBaseRulesPath, iterParse
+from predicate.utils import SeqIndex, checkSeqForm, chunkedMap, mappableDict, seqFormOptionalsIndexes
+from utilclasses import LazySequence, LRUCache
 
 #Export constants and functions
 gameFuncNames = ['[randPlayer]', '[randCard]', '[chosenPlayer]', '[chosenCard]', '[playerOfCard]', '[health]', '[power]', '[potency]', '[symbolPoint]', '[powerCost]']
@@ -83,6 +93,12 @@ def symbolTrans(symbol: str, special: bool = False) -> Tuple[str, ...] | None:
     symType = symbolTypeCalc(symbol)
     if symType is None:
         return None
+    return _typedSymbolTrans(symType, symbol, special)
+
+def _typedSymbolTrans(symType: str, symbol: str, special: bool = False) -> Tuple[str, ...]:
+    """
+    Translates a symbol to a token, with its symbol type already known.
+    """
     if symType == 'var':
         return (symType, str(ord(symbol.lower()) - ord('a') + 1))
     if symType == 'pred':
@@ -112,103 +128,628 @@ def symbolTrans(symbol: str, special: bool = False) -> Tuple[str, ...] | None:
         return (symType, re.search(r'\$[^$:]*:([^$]*)\$', symbol).group(1))
     return (symType,)
 
-@dataclass
+tokenRenderers = {
+    None: lambda token: '',
+    'var': lambda token: chr(int(token[1]) - 1 + ord('a')),
+    'pred': lambda token: chr(int(token[1]) - 1 + ord('A')),
+    'distVar': lambda token: chr(int(token[1]) - 1 + ord('a')) + '_' + token[2],
+    'distPred': lambda token: chr(int(token[1]) - 1 + ord('A')) + '_' + token[2],
+    'connect': lambda token: 'not ' if 'not' in token[1] else ' ' + token[1] + ' ',
+    'equal': lambda token: '=',
+    'comma': lambda token: ',',
+    'player': lambda token: '$player:' + token[1] + '$',
+    'card': lambda token: '$card:' + token[1] + '$',
+}
+tokenRenderers.update((symType, lambda token: token[1]) for symType in (
+    'gameFuncName',
+    'predGFuncName',
+    'predAFuncName',
+    'truth',
+    'quanti',
+    'bracket',
+    'number',
+    'oper',
+    'compare'
+))
+
+def renderToken(token: Tuple) -> str:
+    """
+    Returns the text of a token, as written in a statement string.
+    """
+    render = tokenRenderers.get(token[0])
+    return '{?}' if render is None else render(token)
+
+#One alternation with a named group per symbol type, tried in the same order as symbolsType
+lexRegex = re.compile('|'.join(
+    '(?P<{}>{})'.format(name, regex) for name, regex in symbolsType
+))
+specialLexRegex = re.compile('|'.join(
+    '(?P<{}>{})'.format(name, regex) for name, regex in specialSymbolsType + symbolsType
+))
+
+#Version of lexing and symbol translation, bump on changes to invalidate compiled base rules (see loadBaseRules)
+lexerVersion = 1
+
+def _lexTokens(string: str, special: bool = False) -> Tuple[Tuple, ...]:
+    regex = specialLexRegex if special else lexRegex
+    tokens = []
+    pos, length = 0, len(string)
+    while pos < length:
+        nextTokenMatch = regex.match(string, pos)
+        if nextTokenMatch is None:
+            raise ValueError("Invalid string at '{}'".format(string[pos:]))
+        symType = nextTokenMatch.lastgroup
+        if symType != 'space':
+            tokens.append(_typedSymbolTrans(symType, nextTokenMatch.group(), special))
+        pos = nextTokenMatch.end()
+    return tuple(tokens)
+
+_lexCache: LRUCache | None = None
+
+def setLexCache(maxsize: int | None = 1024) -> LRUCache | None:
+    """
+    Memoizes Statement.lex with an LRU cache of maxsize entries, keyed on (string, special).
+    Disables memoizing when maxsize is None.
+    Returns the new cache, which keeps hit/miss/eviction statistics.
+    """
+    global _lexCache
+    _lexCache = None if maxsize is None else LRUCache(maxsize)
+    return _lexCache
+
+def getLexCache() -> LRUCache | None:
+    """
+    Returns the cache used by Statement.lex, or None if memoizing is disabled.
+    """
+    return _lexCache
+
+_wellformedCache: LRUCache | None = None
+
+def setWellformedCache(maxsize: int | None = 1024) -> LRUCache | None:
+    """
+    Memoizes well-formedness verdicts across statements with an LRU cache of maxsize entries, keyed on tokens.
+    Disables memoizing when maxsize is None (the default state).
+    Returns the new cache, which keeps hit/miss/eviction statistics.
+    """
+    global _wellformedCache
+    _wellformedCache = None if maxsize is None else LRUCache(maxsize)
+    return _wellformedCache
+
+def getWellformedCache() -> LRUCache | None:
+    """
+    Returns the cache of well-formedness verdicts, or None if memoizing is disabled.
+    """
+    return _wellformedCache
+
+def _validateTokens(tokens: Tuple[Tuple, ...]) -> bool | None:
+    #Worker of Statement.validateMany, module-level to be picklable
+    try:
+        return SyntaxParser(tokens).validate()
+    except SyntaxParseError:
+        return None
+
+_tokenTable: LRUCache = LRUCache(65536)
+_statementTable: WeakValueDictionary = WeakValueDictionary()
+
+def internToken(token: Tuple) -> Tuple:
+    """
+    Returns the shared instance of a token.
+    The least recently used tokens stop being shared when the table is full (see setTokenTableSize).
+    """
+    shared = _tokenTable.get(token)
+    if shared is None:
+        _tokenTable.put(token, token)
+        return token
+    return shared
+
+def setTokenTableSize(maxsize: int = 65536) -> LRUCache:
+    """
+    Replaces the table of shared tokens with an empty one of at most maxsize tokens.
+    Returns the new table, which keeps hit/miss/eviction statistics.
+    """
+    global _tokenTable
+    _tokenTable = LRUCache(maxsize)
+    return _tokenTable
+
+def internedCount() -> Tuple[int, int]:
+    """
+    Returns numbers of shared tokens and of live shared statements.
+    """
+    return (len(_tokenTable), len(_statementTable))
+
+class NodeKind(Enum):
+    ATOM = 0
+    FUNCTION = 1
+    QUANTIFIER = 2
+    CONNECTIVE = 3
+    COMPARISON = 4
+    EQUALITY = 5
+    OPERATOR = 6
+
+@dataclass(frozen=True)
+class SyntaxNode:
+    """
+    A node in the syntax tree of a WFF/WFO, spanning tokens from start to end (exclusive).
+    head is the index of its name, quantifier, connective, comparator, equal sign or operator.
+    """
+    kind: NodeKind
+    obj: bool
+    start: int
+    end: int
+    head: int
+    children: Tuple['SyntaxNode', ...] = ()
+
+    def binary(self) -> bool:
+        """
+        Returns whether this is a connective/comparison/equality/operator node with two operands.
+        """
+        return self.kind in (NodeKind.COMPARISON, NodeKind.EQUALITY, NodeKind.OPERATOR) or \
+            (self.kind is NodeKind.CONNECTIVE and len(self.children) == 2)
+
+symbolPoints = {
+    'truth': 0, 'bracket': 0, 'comma': 0,
+    'quanti': 2, 'distVar': 2, 'distPred': 2,
+    'gameFuncName': 4, 'predGFuncName': 4,
+    'predAFuncName': 8,
+} #Other symbol types are worth 1
+
+@dataclass(frozen=True, slots=True)
+class TermAttributes:
+    """
+    Attributes of a WFF/WFO, computed for every subterm in one bottom-up pass (see Statement.attributes).
+    simple and deterministic are the verdicts with obj being the kind of the term,
+    simpleAny and deterministicAny the verdicts with obj being None.
+    Symbols of a subterm are not kept per subterm, they are looked up by span (see Statement.symsIn).
+    """
+    obj: bool
+    simple: bool
+    simpleAny: bool
+    deterministic: bool
+    deterministicAny: bool
+    symbolPoint: int
+    quantifierDepth: int
+
+@dataclass(frozen=True)
+class QuantifierScope:
+    """
+    A forall/exists binder, spanning tokens start to end (exclusive) with its body (see Statement.scopes).
+    bound holds the positions of the occurences of var bound by it, without the one after the quantifier.
+    """
+    quantifier: str
+    var: Tuple
+    start: int
+    end: int
+    bound: Tuple[int, ...]
+
+def _simpleSpan(tokens: Tuple[Tuple, ...], start: int, end: int, obj: bool | None) -> bool:
+    #Rules of Statement.simple for tokens start to end (exclusive)
+    length = end - start
+    if obj or obj is None:
+        if length == 1 and tokens[start][0] in unPureVar: return True
+        if length >= 3 and tokens[start][0] == 'gameFuncName' and tokens[start + 1] == ('bracket', '(') and \
+        all(tokens[index][0] in unPureVar for index in range(start + 2, end, 2)):
+            return True
+        if length == 5 and tokens[start + 1][0] in unPureVar and tokens[start + 2][0] == 'oper' and \
+        tokens[start + 3][0] in unPureVar:
+            return True
+    if (not obj) or obj is None:
+        if length == 1 and tokens[start][0] in unPurePred: return True
+        if length >= 3 and tokens[start][0] in ('predGFuncName', 'predAFuncName') and tokens[start + 1] == ('bracket', '(') and \
+        all(tokens[index][0] in unPureVar for index in range(start + 2, end, 2)):
+            return True
+        if length == 5 and tokens[start + 1][0] in unPureVar and tokens[start + 2][0] in ('compare', 'equal') and \
+        tokens[start + 3][0] in unPureVar:
+            return True
+        if length == 5 and tokens[start + 1][0] in unPurePred and tokens[start + 2][0] == 'connect' and \
+        tokens[start + 3][0] in unPurePred:
+            return True
+    return False
+
+def _deterministicNode(
+        node: SyntaxNode, headType: str, obj: bool | None, simple: bool, children: List[TermAttributes]
+    ) -> bool:
+    #Rules of Statement.deterministic, given the attributes of the children
+    if simple: return True
+    if node.kind is NodeKind.FUNCTION and children:
+        if obj and not headType == 'gameFuncName': return False
+        if (not obj) and not headType in ('predGFuncName', 'predAFuncName'): return False
+        return all(child.deterministic for child in children)
+    if node.binary():
+        return all(child.deterministicAny for child in children)
+    return False
+
+class SyntaxParseError(Exception):
+    def __init__(self, index: int, expected: str):
+        super().__init__(f'Expected {expected} at token {index}')
+        self.index = index
+        self.expected = expected
+
+predFuncNameSymbols = ('predGFuncName', 'predAFuncName', 'distPred', 'pred')
+expectedKinds = {True: 'object', False: 'formula', None: 'formula or object'}
+
+class SyntaxParser:
+    """
+    Parser of WFF/WFO with an explicit stack instead of recursion, in time linear to the number of tokens.
+    Parses length tokens from offset of the token tuple, indexing nodes from offset.
+    """
+    def __init__(self, tokens: Tuple[Tuple, ...], offset: int = 0, length: int | None = None):
+        self.tokens = tokens
+        self.offset = offset
+        self.length = len(tokens) - offset if length is None else length
+
+    def token(self, index: int) -> Tuple | None:
+        return self.tokens[self.offset + index] if index < self.length else None
+
+    def expect(self, index: int, token: Tuple, expected: str) -> None:
+        if self.token(index) != token:
+            raise SyntaxParseError(index, expected)
+
+    def parse(self) -> SyntaxNode:
+        """
+        Parses the whole token sequence, and raises SyntaxParseError if it is not a WFF/WFO.
+        Makes the same left-to-right pass as scan(), building the node of each completed construct.
+        """
+        #Each stack entry is an open construct: (state, start, expected kind, kind of result, node kind, head, children)
+        stack = []
+        index, obj = 0, None
+        while True:
+            #Shift the next expression, up to its first subexpression
+            token = self.token(index)
+            if token == ('bracket', '('):
+                first = self.token(index + 1)
+                if first is not None and first[0] == 'quanti':
+                    self.expect(index + 2, ('bracket', '('), "'('")
+                    var = self.token(index + 3)
+                    if var is None or var[0] not in varSymbols:
+                        raise SyntaxParseError(index + 3, 'variable')
+                    self.expect(index + 4, ('bracket', ')'), "')'")
+                    stack.append(('close', index, obj, False, NodeKind.QUANTIFIER, index + 1, []))
+                    index, obj = index + 5, False
+                elif first == ('connect', 'not'):
+                    stack.append(('close', index, obj, False, NodeKind.CONNECTIVE, index + 1, []))
+                    index, obj = index + 2, False
+                else:
+                    stack.append(('mid', index, obj, None, None, None, []))
+                    index, obj = index + 1, None
+                continue
+            if token is None or not (token[0] in varFuncSymbols or token[0] in predSymbols):
+                raise SyntaxParseError(index, expectedKinds[obj])
+            nodeObj = token[0] in varFuncSymbols
+            if self.token(index + 1) == ('bracket', '(') and (nodeObj or token[0] in predFuncNameSymbols):
+                if self.token(index + 2) != ('bracket', ')'):
+                    stack.append(('arg', index, obj, nodeObj, NodeKind.FUNCTION, index, []))
+                    index, obj = index + 2, True
+                    continue
+                node = SyntaxNode(NodeKind.FUNCTION, nodeObj, index, index + 3, index)
+            else:
+                node = SyntaxNode(NodeKind.ATOM, nodeObj, index, index + 1, index)
+
+            #Reduce completed expressions, until one opens another subexpression
+            while True:
+                if obj is not None and node.obj != obj:
+                    raise SyntaxParseError(node.start, expectedKinds[obj])
+                if not stack:
+                    if node.end != self.length:
+                        raise SyntaxParseError(node.end, 'end of statement')
+                    return node
+                state, start, obj, resultObj, kind, head, children = stack.pop()
+                children.append(node)
+                end = node.end
+                if state == 'arg':
+                    if self.token(end) == ('comma',):
+                        end += 1
+                    elif self.token(end) != ('bracket', ')'):
+                        raise SyntaxParseError(end, "',' or ')'")
+                    if self.token(end) != ('bracket', ')'):
+                        stack.append((state, start, obj, resultObj, kind, head, children))
+                        index, obj = end, True
+                        break
+                    node = SyntaxNode(kind, resultObj, start, end + 1, head, tuple(children))
+                elif state == 'mid':
+                    mid = self.token(end)
+                    if mid is not None and mid[0] == 'connect' and mid[1] != 'not':
+                        kind, argObj, resultObj = NodeKind.CONNECTIVE, False, False
+                    elif mid == ('equal',):
+                        kind, argObj, resultObj = NodeKind.EQUALITY, True, False
+                    elif mid is not None and mid[0] == 'compare':
+                        kind, argObj, resultObj = NodeKind.COMPARISON, True, False
+                    elif mid is not None and mid[0] == 'oper':
+                        kind, argObj, resultObj = NodeKind.OPERATOR, True, True
+                    else:
+                        raise SyntaxParseError(end, 'connective, equal sign, comparator or operator')
+                    if node.obj != argObj:
+                        raise SyntaxParseError(start + 1, 'object' if argObj else 'formula')
+                    stack.append(('close', start, obj, resultObj, kind, end, children))
+                    index, obj = end + 1, argObj
+                    break
+                else:
+                    self.expect(end, ('bracket', ')'), "')'")
+                    node = SyntaxNode(kind, resultObj, start, end + 1, head, tuple(children))
+
+    def validate(self) -> bool:
+        """
+        Checks the whole token sequence in one left-to-right pass, keeping open brackets on a stack
+        instead of recursing and building nodes.
+        Returns whether it is a WFO (else a WFF), and raises SyntaxParseError like parse() if neither.
+        """
+        obj, end = self.scan()
+        if end != self.length:
+            raise SyntaxParseError(end, 'end of statement')
+        return obj
+
+    def scan(self) -> Tuple[bool, int]:
+        """
+        Checks the WFF/WFO starting at the first token like validate(), allowing tokens after it.
+        Returns whether it is a WFO and where it ends.
+        """
+        #Each stack entry is an open construct: (state, start, expected kind, kind of result)
+        stack = []
+        index, obj = 0, None
+        while True:
+            #Shift the next expression, up to its first subexpression
+            token = self.token(index)
+            if token == ('bracket', '('):
+                first = self.token(index + 1)
+                if first is not None and first[0] == 'quanti':
+                    self.expect(index + 2, ('bracket', '('), "'('")
+                    var = self.token(index + 3)
+                    if var is None or var[0] not in varSymbols:
+                        raise SyntaxParseError(index + 3, 'variable')
+                    self.expect(index + 4, ('bracket', ')'), "')'")
+                    stack.append(('close', index, obj, False))
+                    index, obj = index + 5, False
+                elif first == ('connect', 'not'):
+                    stack.append(('close', index, obj, False))
+                    index, obj = index + 2, False
+                else:
+                    stack.append(('mid', index, obj, None))
+                    index, obj = index + 1, None
+                continue
+            if token is None or not (token[0] in varFuncSymbols or token[0] in predSymbols):
+                raise SyntaxParseError(index, expectedKinds[obj])
+            start, nodeObj, end = index, token[0] in varFuncSymbols, index + 1
+            if self.token(end) == ('bracket', '(') and (nodeObj or token[0] in predFuncNameSymbols):
+                if self.token(end + 1) != ('bracket', ')'):
+                    stack.append(('arg', index, obj, nodeObj))
+                    index, obj = end + 1, True
+                    continue
+                end += 2
+
+            #Reduce completed expressions, until one opens another subexpression
+            while True:
+                if obj is not None and nodeObj != obj:
+                    raise SyntaxParseError(start, expectedKinds[obj])
+                if not stack:
+                    return nodeObj, end
+                state, start, obj, resultObj = stack.pop()
+                if state == 'arg':
+                    if self.token(end) == ('comma',):
+                        end += 1
+                    elif self.token(end) != ('bracket', ')'):
+                        raise SyntaxParseError(end, "',' or ')'")
+                    if self.token(end) != ('bracket', ')'):
+                        stack.append((state, start, obj, resultObj))
+                        index, obj = end, True
+                        break
+                    nodeObj, end = resultObj, end + 1
+                elif state == 'mid':
+                    mid = self.token(end)
+                    if mid is not None and mid[0] == 'connect' and mid[1] != 'not':
+                        argObj, resultObj = False, False
+                    elif mid == ('equal',) or (mid is not None and mid[0] == 'compare'):
+                        argObj, resultObj = True, False
+                    elif mid is not None and mid[0] == 'oper':
+                        argObj, resultObj = True, True
+                    else:
+                        raise SyntaxParseError(end, 'connective, equal sign, comparator or operator')
+                    if nodeObj != argObj:
+                        raise SyntaxParseError(start + 1, 'object' if argObj else 'formula')
+                    stack.append(('close', start, obj, resultObj))
+                    index, obj = end + 1, argObj
+                    break
+                else:
+                    self.expect(end, ('bracket', ')'), "')'")
+                    nodeObj, end = resultObj, end + 1
+
+@dataclass(frozen=True, slots=True, weakref_slot=True)
 class Statement:
     """
-    A statement in predicate logic
+    A statement in predicate logic, immutable and hashable.
+    Use StatementBuilder to assemble or modify tokens.
     """
     statement: Tuple[Tuple, ...]
+    #Values derived from the tokens, computed once (see _derived)
+    _hash: int = field(init=False, repr=False, compare=False)
+    _canonical: Tuple[Tuple, ...] = field(init=False, repr=False, compare=False)
+    _text: str = field(init=False, repr=False, compare=False)
+    _syntaxTree: SyntaxNode | None = field(init=False, repr=False, compare=False)
+    _wellformedKind: bool | None = field(init=False, repr=False, compare=False)
+    _syntaxError: SyntaxParseError | None = field(init=False, repr=False, compare=False)
+    _bracketTable: Tuple[int, ...] | None = field(init=False, repr=False, compare=False)
+    _attributeTable: dict[Tuple[int, int], TermAttributes] = field(init=False, repr=False, compare=False)
+    _symbolPoint: int = field(init=False, repr=False, compare=False)
+    _symbolPositions: Mapping[Tuple, Tuple[int, ...]] = field(init=False, repr=False, compare=False)
+    _scopes: Tuple[Tuple[QuantifierScope, ...], Mapping[Tuple, Tuple[int, ...]]] | None = field(init=False, repr=False, compare=False)
+    _freeVars: FrozenSet[Tuple[str, ...]] = field(init=False, repr=False, compare=False)
+    _seqIndex: SeqIndex = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if type(self.statement) is not tuple:
+            object.__setattr__(self, 'statement', tuple(self.statement))
 
     @staticmethod
     def lex(string: str, special: bool = False) -> 'Statement':
         """
         Tokenize statement from string.
+        Scans once from left to right with a precompiled regex.
+        Token tuples are shared from the lex cache when it is enabled (see setLexCache).
         """
-        tokens = []
-        unLexed = string
-        while unLexed:
-            if special:
-                typeDetect = tuple(re.match(regex, unLexed) for _, regex in specialSymbolsType)
-                if any(typeDetect):
-                    typeDetectIndex = tuple(
-                        re.match(regex, unLexed).start()
-                        if re.match(regex, unLexed)
-                        else float('inf')
-                        for _, regex in specialSymbolsType
-                    )
-                    nextTokenMatch = typeDetect[typeDetectIndex.index(min(typeDetectIndex))]
-                    nextToken = symbolTrans(nextTokenMatch.group(), special=True)
-                    tokens.append(nextToken)
-                    unLexed = unLexed[nextTokenMatch.end():]
-                    continue
+        if _lexCache is None:
+            return Statement(_lexTokens(string, special))
+        tokens = _lexCache.get((string, special))
+        if tokens is None:
+            tokens = _lexTokens(string, special)
+            _lexCache.put((string, special), tokens)
+        return Statement(tokens)
 
-            typeDetect = tuple(re.match(regex, unLexed) for _, regex in symbolsType)
-            if any(typeDetect):
-                typeDetectIndex = tuple(
-                    re.match(regex, unLexed).start()
-                    if re.match(regex, unLexed)
-                    else float('inf')
-                    for _, regex in symbolsType
-                )
-                nextTokenMatch = typeDetect[typeDetectIndex.index(min(typeDetectIndex))]
-                nextToken = symbolTrans(nextTokenMatch.group())
-                if nextToken != ('space',):
-                    tokens.append(nextToken)
-                unLexed = unLexed[nextTokenMatch.end():]
+    @staticmethod
+    def lexMany(
+            strings: Iterable[str],
+            special: bool = False,
+            processes: int | None = None,
+            chunksize: int = 64,
+            executor = None
+        ) -> Tuple['Statement', ...]:
+        """
+        Tokenize statements from many strings, in input order.
+        Each distinct string is lexed once per batch, using the lex cache when it is enabled.
+        Lexes in the given executor, or in the shared pool of processes if processes > 1,
+        if the batch is larger than one chunk (see chunkedMap).
+        """
+        strings = tuple(strings)
+        lexed = {}
+        pending = []
+        for string in strings:
+            if string in lexed:
+                continue
+            tokens = None if _lexCache is None else _lexCache.get((string, special))
+            lexed[string] = tokens
+            if tokens is None:
+                pending.append(string)
+        results = chunkedMap(partial(_lexTokens, special=special), pending, processes, chunksize, executor)
+        for string, tokens in zip(pending, results):
+            lexed[string] = tokens
+            if _lexCache is not None:
+                _lexCache.put((string, special), tokens)
+        return tuple(Statement(lexed[string]) for string in strings)
+
+    @staticmethod
+    def validateMany(
+            statements: Iterable['Statement'],
+            obj: bool | None = False,
+            processes: int | None = None,
+            chunksize: int = 64,
+            executor = None
+        ) -> Tuple[bool, ...]:
+        """
+        Check whether each statement is a WFO (obj is True), a WFF (obj is False) or either (obj is None), in input order.
+        Each distinct token sequence is validated once per batch, skipping statements already validated,
+        and using the well-formedness cache when it is enabled (see setWellformedCache).
+        Validates in the given executor, or in the shared pool of processes if processes > 1,
+        if the batch is larger than one chunk (see chunkedMap), sending only the token tuples to the workers.
+        """
+        statements = tuple(statements)
+        missing = object()
+        kinds = {}
+        pending = []
+        for statement in statements:
+            tokens = statement.statement
+            if tokens in kinds:
+                continue
+            try:
+                kind = statement._wellformedKind
+            except AttributeError:
+                kind = missing if _wellformedCache is None else _wellformedCache.get(tokens, missing)
+                if kind is missing:
+                    pending.append(tokens)
+            kinds[tokens] = kind
+        results = chunkedMap(_validateTokens, pending, processes, chunksize, executor)
+        for tokens, kind in zip(pending, results):
+            kinds[tokens] = kind
+            if _wellformedCache is not None:
+                _wellformedCache.put(tokens, kind)
+        verdicts = []
+        for statement in statements:
+            kind = kinds[statement.statement]
+            object.__setattr__(statement, '_wellformedKind', kind)
+            verdicts.append(kind is not None if obj is None else kind is obj)
+        return tuple(verdicts)
+
+    def _derived(self, name: str, compute: Callable[[], Any]) -> Any:
+        """
+        Returns a value derived from the tokens, computing it once and caching it in its slot.
+        """
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            value = compute()
+            object.__setattr__(self, name, value)
+            return value
+
+    def intern(self) -> 'Statement':
+        """
+        Returns the shared statement with the same tokens, made of shared tokens.
+        It is shared for as long as something references it.
+        """
+        shared = _statementTable.get(self.statement)
+        if shared is None:
+            tokens = tuple(map(internToken, self.statement))
+            if all(token is original for token, original in zip(tokens, self.statement)):
+                shared = self
             else:
-                raise ValueError("Invalid string at '{}'".format(unLexed))
-        return Statement(tuple(tokens))
+                shared = Statement(tokens)
+            shared = _statementTable.setdefault(tokens, shared)
+        return shared
+
+    def canonical(self, names: dict[Tuple, Tuple] | None = None) -> Tuple[Tuple, ...]:
+        """
+        Returns the alpha-normal form of the tokens, with vars and preds renamed to
+        ('canonVar', n) and ('canonPred', n) in order of first occurrence.
+        Statements are equal exactly when their alpha-normal forms are.
+        A shared names dict (updated in place) renames several statements consistently.
+        """
+        if names is None:
+            return self._derived('_canonical', lambda: self.canonical({}))
+        res = []
+        for token in self:
+            name = names.get(token)
+            if name is None:
+                if token[0] in varSymbols:
+                    name = names[token] = ('canonVar', len(names))
+                elif token[0] in predSymbols:
+                    name = names[token] = ('canonPred', len(names))
+                else:
+                    name = token
+            res.append(name)
+        return tuple(res)
+
+    def __hash__(self) -> int:
+        return self._derived('_hash', lambda: hash(self.canonical()))
+
+    def __copy__(self) -> 'Statement':
+        return self
+
+    def __deepcopy__(self, memo: dict) -> 'Statement':
+        return self
+
+    def __reduce__(self):
+        return (Statement, (self.statement,))
 
     def __str__(self) -> str:
-        res = ''
-        for symType, *symVal in self:
-            if symType is None:
-                pass
-            elif symType == 'var':
-                res += chr(int(symVal[0]) - 1 + ord('a'))
-            elif symType == 'pred':
-                res += chr(int(symVal[0]) - 1 + ord('A'))
-            elif symType == 'distVar':
-                res += chr(int(symVal[0]) - 1 + ord('a')) + '_' + symVal[1]
-            elif symType == 'distPred':
-                res += chr(int(symVal[0]) - 1 + ord('A')) + '_' + symVal[1]
-            elif symType == 'connect':
-                if 'not' in symVal[0]:
-                    res += 'not '
-                else: res += ' {} '.format(symVal[0])
-            elif symType in [
-                'gameFuncName',
-                'predGFuncName',
-                'predAFuncName',
-                'truth',
-                'quanti',
-                'bracket',
-                'number',
-                'oper',
-                'compare'
-            ]:
-                res += symVal[0]
-            elif symType == 'equal':
-                res += '='
-            elif symType == 'comma':
-                res += ','
-            elif symType in specialSymbols:
-                res += f'${symType}:{symVal}$'
-            else:
-                res += '{?}'
-        return res
+        return self._derived('_text', lambda: ''.join(map(renderToken, self)))
 
     def __getitem__(self, key):
         return self.statement[key]
 
-    def __setitem__(self, key, value):
-        self.statement = list(self.statement)
-        self.statement[key] = value
-        self.statement = tuple(self.statement)
-
     def __len__(self):
         return len(self.statement)
 
+    def __iter__(self) -> Iterator[Tuple]:
+        return iter(self.statement)
+
+    def _buffer(self) -> Tuple[Tuple[Tuple, ...], int]:
+        """
+        Returns the token tuple holding this statement, and the offset of this statement in it.
+        """
+        return (self.statement, 0)
+
+    def view(self, start: int, end: int) -> 'StatementView':
+        """
+        Returns tokens start to end (exclusive) as a statement, without copying them.
+        Like slicing, it is empty if end is before start.
+        """
+        buffer, offset = self._buffer()
+        return StatementView(buffer, offset + start, offset + max(start, end))
+
     def eq(self, statement: 'Statement', startingMaps = None) -> Tuple[bool, dict[Tuple, Tuple] | None]:
         """
         Check if two statements are functionally equivalent
@@ -236,15 +777,18 @@ class Statement:
         """
         Returns vars and preds in the statement.
         """
-        syms = set()
-        for sym in self:
-            if sym[0] in varSymbols or sym[0] in predSymbols:
-                syms.add(sym)
-        return syms
+        return set(self.symbolPositions())
 
     def __eq__(self, statement: 'Statement', maps = None) -> bool:
-        if maps is None: maps = {}
-        return self.eq(statement, maps)[0]
+        if maps:
+            return self.eq(statement, maps)[0]
+        if self is statement: return True
+        if not isinstance(statement, Statement): return False
+        if len(self) != len(statement): return False
+        buffer, offset = self._buffer()
+        otherBuffer, otherOffset = statement._buffer()
+        if buffer is otherBuffer and offset == otherOffset: return True
+        return self.canonical() == statement.canonical()
 
     def __add__(self, statement: 'Statement') -> 'Statement':
         assert isinstance(statement, Statement), 'must add with a valid instance of class "Statement"'
@@ -262,6 +806,8 @@ class Statement:
         """
         Checks if the statement form fits the statement.
         """
+        if not startingMaps and not mid[:1] == (('bracket', '('),):
+            return compileForm(tuple(start), tuple(end), tuple(mid), opt1obj, opt2obj).match(self) is not None
 
         #Check form first
         if not checkSeqForm(
@@ -269,7 +815,8 @@ class Statement:
             start,
             end,
             mid,
-            startEndMatch=lambda x, y: Statement(x) == Statement(y)
+            startEndMatch=lambda x, y: Statement(x) == Statement(y),
+            seqIndex=self.seqIndex()
         ): return False
 
         #Prepare maps
@@ -279,7 +826,8 @@ class Statement:
             start,
             end,
             mid,
-            startEndMatch=lambda x, y: Statement(x) == Statement(y)
+            startEndMatch=lambda x, y: Statement(x) == Statement(y),
+            seqIndex=self.seqIndex()
         )[0]
         check = Statement(self[:startEndIndexes[0]]).eq(Statement(start), startingMaps=maps)
         if not check[0]: return False
@@ -296,14 +844,14 @@ class Statement:
             if opt2obj: opt2wellmethod = 'wellformedobj'
             else: opt2wellmethod = 'wellformed'
             minIndexes = seqFormOptionalsIndexes(self, start, end, mid, midcond=lambda index: \
-                        getattr(Statement(self[startEndIndexes[0]:index]), opt1wellmethod)() and \
-                        getattr(Statement(self[index+len(mid):startEndIndexes[1]]), opt2wellmethod)() \
-            , startEndMatch=lambda x, y: Statement(x) == Statement(y))[1]
+                        getattr(self.view(startEndIndexes[0], index), opt1wellmethod)() and \
+                        getattr(self.view(index+len(mid), startEndIndexes[1]), opt2wellmethod)() \
+            , startEndMatch=lambda x, y: Statement(x) == Statement(y), seqIndex=self.seqIndex())[1]
             for minIndex in minIndexes:
                 if self[minIndex[0] : minIndex[1]] == mid:
                     return True
             return False
-        if not getattr(Statement(self[startEndIndexes[0]:startEndIndexes[1]]), opt1wellmethod)():
+        if not getattr(self.view(startEndIndexes[0], startEndIndexes[1]), opt1wellmethod)():
             return False
 
         #All filters passed - great!
@@ -321,6 +869,9 @@ class Statement:
         """
         Returns all optional formulas (or objs) in statement if it fits with the statement form.
         """
+        if not startingMaps and not mid[:1] == (('bracket', '('),):
+            formulas = compileForm(tuple(start), tuple(end), tuple(mid), opt1obj, opt2obj).match(self)
+            return None if formulas is None else (formulas,)
 
         #Check form first
         if not checkSeqForm(
@@ -328,7 +879,8 @@ class Statement:
             start,
             end,
             mid,
-            startEndMatch=lambda x, y: Statement(x) == Statement(y)
+            startEndMatch=lambda x, y: Statement(x) == Statement(y),
+            seqIndex=self.seqIndex()
         ): return None
 
         #Prepare maps
@@ -338,7 +890,8 @@ class Statement:
             start,
             end,
             mid,
-            startEndMatch=lambda x, y: Statement(x) == Statement(y)
+            startEndMatch=lambda x, y: Statement(x) == Statement(y),
+            seqIndex=self.seqIndex()
         )[0]
         check = Statement(self[:startEndIndexes[0]]).eq(Statement(start), startingMaps=maps)
         if not check[0]: return None
@@ -357,321 +910,242 @@ class Statement:
             if opt2obj: opt2wellmethod = 'wellformedobj'
             else: opt2wellmethod = 'wellformed'
             minIndexes = seqFormOptionalsIndexes(self, start, end, mid, midcond=lambda index: \
-                        getattr(Statement(self[startEndIndexes[0]:index]), opt1wellmethod)() and \
-                        getattr(Statement(self[index+len(mid):startEndIndexes[1]]), opt2wellmethod)() \
-            , startEndMatch=lambda x, y: Statement(x) == Statement(y))[1]
+                        getattr(self.view(startEndIndexes[0], index), opt1wellmethod)() and \
+                        getattr(self.view(index+len(mid), startEndIndexes[1]), opt2wellmethod)() \
+            , startEndMatch=lambda x, y: Statement(x) == Statement(y), seqIndex=self.seqIndex())[1]
             for minIndex in minIndexes:
                 if self[minIndex[0] : minIndex[1]] == mid:
                     return tuple(
                         (
-                            Statement(self[startEndIndexes[0]:minIndex[0]]),
-                            Statement(self[minIndex[1]:startEndIndexes[1]])
+                            self.view(startEndIndexes[0], minIndex[0]),
+                            self.view(minIndex[1], startEndIndexes[1])
                         )
                         for minIndex in minIndexes
                     )
             return None
         else:
-            if not getattr(Statement(self[startEndIndexes[0]:startEndIndexes[1]]), opt1wellmethod)():
+            if not getattr(self.view(startEndIndexes[0], startEndIndexes[1]), opt1wellmethod)():
                 return None
-        return ( ( Statement(self[startEndIndexes[0]:startEndIndexes[1]],) ,) ,)
+        return ( ( self.view(startEndIndexes[0], startEndIndexes[1]) ,) ,)
 
-    def wellformedobj(self) -> bool:
+    def syntaxTree(self) -> SyntaxNode | None:
         """
-        Check whether the object is well-formed.
+        Returns the syntax tree of the WFF/WFO, or None if ill-formed.
+        The tree is parsed once and cached on the statement.
         """
+        return self._derived('_syntaxTree', self._parse)
 
-        if len(self) == 0: return False
-        if len(self) == 1:
-            return self.statement[0][0] in varFuncSymbols
-        if len(self) > 2:
-            #Function syntax
-            if self[1] == ('bracket', '(') and self[-1] == ('bracket', ')') and \
-            self[0][0] in varFuncSymbols:
-                paramsLeft = self[2:-1]
-                while len(paramsLeft) > 0:
-                    paramEndIndex = next(
-                        (
-                            index for index in range(len(paramsLeft) + 1)
-                            if Statement(paramsLeft[:index]).wellformedobj() and \
-                            not (index < len(paramsLeft) and not paramsLeft[index] == ('comma',))
-                        ),
-                        None
-                    )
-                    if paramEndIndex is None: return Statement(paramsLeft).wellformedobj()
-                    paramsLeft = paramsLeft[paramEndIndex+1:]
-                return True
-
-            #Operator syntax
-            elif self.form((
-                ('bracket', '('),
-            ), (
-                ('bracket', ')'),
-            ), (
-                ('oper', '+'),
-            ),
-            opt1obj=True,
-            opt2obj=True,
-            ): return True
-            elif self.form((
-                ('bracket', '('),
-            ), (
-                ('bracket', ')'),
-            ), (
-                ('oper', '-'),
-            ),
-            opt1obj=True,
-            opt2obj=True,
-            ): return True
-            elif self.form((
-                ('bracket', '('),
-            ), (
-                ('bracket', ')'),
-            ), (
-                ('oper', '*'),
-            ),
-            opt1obj=True,
-            opt2obj=True,
-            ): return True
-            elif self.form((
-                ('bracket', '('),
-            ), (
-                ('bracket', ')'),
-            ), (
-                ('oper', '/'),
-            ),
-            opt1obj=True,
-            opt2obj=True,
-            ): return True
-            elif self.form((
-                ('bracket', '('),
-            ), (
-                ('bracket', ')'),
-            ), (
-                ('oper', 'f/'),
-            ),
-            opt1obj=True,
-            opt2obj=True,
-            ): return True
-            elif self.form((
-                ('bracket', '('),
-            ), (
-                ('bracket', ')'),
-            ), (
-                ('oper', 'c/'),
-            ),
-            opt1obj=True,
-            opt2obj=True,
-            ): return True
-            elif self.form((
-                ('bracket', '('),
-            ), (
-                ('bracket', ')'),
-            ), (
-                ('oper', '%'),
-            ),
-            opt1obj=True,
-            opt2obj=True,
-            ): return True
-        return False
+    def _parse(self) -> SyntaxNode | None:
+        if self.wellformedKind() is None:
+            return None
+        buffer, offset = self._buffer()
+        try:
+            return SyntaxParser(buffer, offset, len(self)).parse()
+        except SyntaxParseError:
+            return None
 
+    def _validate(self) -> bool | None:
+        cache = _wellformedCache
+        if cache is not None:
+            kind = cache.get(self.statement, cache)
+            if kind is not cache:
+                return kind
+        buffer, offset = self._buffer()
+        try:
+            kind = SyntaxParser(buffer, offset, len(self)).validate()
+        except SyntaxParseError as error:
+            kind = None
+            object.__setattr__(self, '_syntaxError', error)
+        if cache is not None:
+            cache.put(self.statement, kind)
+        return kind
+
+    def _findSyntaxError(self) -> SyntaxParseError | None:
+        #For verdicts taken from a cache or a batch, which keep no error
+        buffer, offset = self._buffer()
+        try:
+            SyntaxParser(buffer, offset, len(self)).validate()
+        except SyntaxParseError as error:
+            return error
+        return None
 
-    def wellformed(self) -> bool:
+    def wellformedKind(self) -> bool | None:
         """
-        Check whether the statement is well-formed.
+        Returns True for a WFO, False for a WFF and None if ill-formed.
+        Validated once in a single pass and cached on the statement,
+        and across statements with the same tokens if enabled (see setWellformedCache).
         """
+        return self._derived('_wellformedKind', self._validate)
 
-        if len(self) == 0: return False
-        if len(self) == 1:
-            return self[0][0] in predSymbols
-
-        #For All syntax
-        if self.form(
-            (
-                ('bracket', '('),
-                ('quanti', 'forall'),
-                ('bracket', '('),
-                ('var', '0'),
-                ('bracket', ')'),
-            ),
-            (
-                ('bracket', ')'),
-            ),
-        ): return True
-
-        #Exists syntax
-        if self.form(
-            (
-                ('bracket', '('),
-                ('quanti', 'exists'),
-                ('bracket', '('),
-                ('var', '0'),
-                ('bracket', ')'),
-            ),
-            (
-                ('bracket', ')'),
-            ),
-        ): return True
-
-        #Not syntax
-        if self.form(
-            (
-                ('bracket', '('),
-                ('connect', 'not'),
-            ),
-            (
-                ('bracket', ')'),
-            ),
-        ): return True
-
-        #And syntax
-        if self.form(
-            (
-                ('bracket', '('),
-            ),
-            (
-                ('bracket', ')'),
-            ),
-            (
-                ('connect', 'and'),
-            ),
-        ): return True
-
-        #Or syntax
-        if self.form(
-            (
-                ('bracket', '('),
-            ),
-            (
-                ('bracket', ')'),
-            ),
-            (
-                ('connect', 'or'),
-            ),
-        ): return True
-
-        #Imply syntax
-        if self.form(
-            (
-                ('bracket', '('),
-            ),
-            (
-                ('bracket', ')'),
-            ),
-            (
-                ('connect', 'imply'),
-            ),
-        ): return True
-
-        #Equal syntax
-        if self.form(
-            (
-                ('bracket', '('),
-            ),
-            (
-                ('bracket', ')'),
-            ),
-            (
-                ('equal',),
-            ),
-            opt1obj=True,
-            opt2obj=True,
-        ): return True
-
-        #Comparator syntax
-        if self.form(
-            (
-                ('bracket', '('),
-            ),
-            (
-                ('bracket', ')'),
-            ),
-            (
-                ('compare', '<'),
-            ),
-            opt1obj=True,
-            opt2obj=True,
-        ): return True
-
-        if self.form(
-            (
-                ('bracket', '('),
-            ),
-            (
-                ('bracket', ')'),
-            ),
-            (
-                ('compare', '>'),
-            ),
-            opt1obj=True,
-            opt2obj=True,
-        ): return True
-
-        #Function syntax
-        if self[1] == ('bracket', '(') and self[-1] == ('bracket', ')') and \
-        self[0][0] in ('predGFuncName', 'predAFuncName', 'distPred', 'pred'):
-            paramsLeft = self[2:-1]
-            while len(paramsLeft) > 0:
-                paramEndIndex = next(
-                    (
-                        index for index in range(len(paramsLeft) + 1)
-                        if Statement(paramsLeft[:index]).wellformedobj() and \
-                        not (index < len(paramsLeft) and not paramsLeft[index] == ('comma',))
-                    ),
-                    None
-                )
-                if paramEndIndex is None: return Statement(paramsLeft).wellformedobj()
-                paramsLeft = paramsLeft[paramEndIndex+1:]
-            return True
+    def diagnose(self, obj: bool | None = None) -> SyntaxParseError | None:
+        """
+        Returns None if the statement is a WFO (obj is True), a WFF (obj is False) or either (obj is None),
+        else the error with the first offending token index and the expected construct.
+        The error is kept from the validating pass, so it is found without validating again.
+        """
+        kind = self.wellformedKind()
+        if kind is None:
+            return self._derived('_syntaxError', self._findSyntaxError)
+        if obj is not None and kind is not obj:
+            return SyntaxParseError(0, expectedKinds[obj])
+        return None
+
+    def wellformedobj(self) -> bool:
+        """
+        Check whether the object is well-formed.
+        """
+        return self.wellformedKind() is True
 
-        return False
+    def wellformed(self) -> bool:
+        """
+        Check whether the statement is well-formed.
+        """
+        return self.wellformedKind() is False
 
     def functionArgs(self) -> Tuple['Statement', ...] | None:
         """
         Returns all arguments of a well-formed function.
-        Throws error if not a well-formed function.
+        Returns None if not a well-formed function.
         """
-        if not (self.wellformed() or self.wellformedobj()):
+        tree = self.syntaxTree()
+        if tree is None or tree.kind is not NodeKind.FUNCTION:
             return None
-        if not (len(self) >= 3 and self[0][0] in \
-                 (x for x in varSymbols + predSymbols if x not in (unPureVar + unPurePred)) \
-                 and self[1] == ('bracket', '(')):
+        if self[0][0] not in (x for x in varSymbols + predSymbols if x not in (unPureVar + unPurePred)):
             return None
-        paramsLeft = self[2:-1]
-        params = []
-        while len(paramsLeft) > 0:
-            #Function param getter
-            paramEndIndex = next(
-                (
-                    index for index in range(len(paramsLeft) + 1)
-                    if Statement(paramsLeft[:index]).wellformedobj() and \
-                    not (index < len(paramsLeft) and not paramsLeft[index] == ('comma',))
-                ),
-                None
+        return self._childViews(tree.children)
+
+    def _childViews(self, nodes: Iterable[SyntaxNode]) -> Tuple['StatementView', ...]:
+        #Views of subterms, which are known well-formed and share the attribute table if computed
+        views = tuple(self.view(node.start, node.end) for node in nodes)
+        for node, view in zip(nodes, views):
+            object.__setattr__(view, '_wellformedKind', node.obj)
+        try:
+            table = self._attributeTable
+        except AttributeError:
+            return views
+        for view in views:
+            object.__setattr__(view, '_attributeTable', table)
+        return views
+
+    def attributes(self) -> TermAttributes | None:
+        """
+        Returns attributes of the WFF/WFO, or None if ill-formed.
+        Attributes of every subterm are computed in one bottom-up pass over the syntax tree,
+        cached on the statement and shared with the subterms returned by functionArgs and operatorArgs.
+        """
+        table = self._derived('_attributeTable', self._computeAttributes)
+        buffer, offset = self._buffer()
+        return table.get((offset, offset + len(self)))
+
+    def _computeAttributes(self) -> dict[Tuple[int, int], TermAttributes]:
+        tree = self.syntaxTree()
+        if tree is None:
+            return {}
+        buffer, offset = self._buffer()
+        points = [0]
+        for symType, *_ in self:
+            points.append(points[-1] + symbolPoints.get(symType, 1))
+        #Keyed on spans in the buffer, so views of subterms can look themselves up
+        table = {}
+        stack = [(tree, False)]
+        while stack:
+            node, visited = stack.pop()
+            if not visited:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children)
+                continue
+            start, end = offset + node.start, offset + node.end
+            children = [table[(offset + child.start, offset + child.end)] for child in node.children]
+            headType = buffer[offset + node.head][0]
+            simple = _simpleSpan(buffer, start, end, node.obj)
+            simpleAny = _simpleSpan(buffer, start, end, None)
+            table[(start, end)] = TermAttributes(
+                node.obj,
+                simple,
+                simpleAny,
+                _deterministicNode(node, headType, node.obj, simple, children),
+                _deterministicNode(node, headType, None, simpleAny, children),
+                points[node.end] - points[node.start],
+                max((child.quantifierDepth for child in children), default=0) + (node.kind is NodeKind.QUANTIFIER),
             )
-            if paramEndIndex is None: return Statement(paramsLeft).wellformedobj()
-            params.append(paramsLeft[:paramEndIndex])
-            paramsLeft = paramsLeft[paramEndIndex+1:]
-        return tuple((Statement(param) for param in params))
+        return table
+
+    def seqIndex(self) -> SeqIndex:
+        """
+        Returns the positions of each token, for repeated token sequence searches.
+        Built once and cached on the statement.
+        """
+        return self._derived('_seqIndex', lambda: SeqIndex(self))
+
+    def symbolPositions(self) -> Mapping[Tuple, Tuple[int, ...]]:
+        """
+        Returns the positions of each var and pred in the statement, in order of first occurence.
+        Built once from the token positions (see seqIndex) and cached on the statement, so it is read-only.
+        """
+        return self._derived('_symbolPositions', lambda: MappingProxyType({
+            sym: positions for sym, positions in self.seqIndex().positions.items()
+            if sym[0] in varSymbols or sym[0] in predSymbols
+        }))
+
+    def symsIn(self, start: int, end: int) -> Set[Tuple[str, ...]]:
+        """
+        Returns vars and preds in tokens start to end (exclusive), such as the span of a subterm.
+        Looked up in the symbol positions (see symbolPositions), without scanning the span.
+        """
+        syms = set()
+        for sym, positions in self.symbolPositions().items():
+            index = bisect_left(positions, start)
+            if index < len(positions) and positions[index] < end:
+                syms.add(sym)
+        return syms
+
+    def positionsOf(self, symbol: Tuple) -> Tuple[int, ...]:
+        """
+        Returns the positions of a token in the statement.
+        """
+        return self.seqIndex().positions.get(symbol, ())
+
+    def bracketTable(self) -> Tuple[int, ...] | None:
+        """
+        Returns the index of the matching bracket of each token (-1 for other tokens).
+        Returns None if brackets mismatch.
+        Built once and cached on the statement.
+        """
+        return self._derived('_bracketTable', self._matchBrackets)
+
+    def _matchBrackets(self) -> Tuple[int, ...] | None:
+        table = [-1] * len(self)
+        opened = []
+        for index, token in enumerate(self):
+            if token == ('bracket', '('):
+                opened.append(index)
+            elif token == ('bracket', ')'):
+                if not opened:
+                    return None
+                table[index] = opened.pop()
+                table[table[index]] = index
+        return None if opened else tuple(table)
+
+    def matchingBracket(self, index: int) -> int | None:
+        """
+        Returns the index of the bracket matching the one at index.
+        Returns None if index is out of range, there is no bracket at index or brackets mismatch.
+        """
+        table = self.bracketTable()
+        if table is None or not 0 <= index < len(table) or table[index] < 0:
+            return None
+        return table[index]
 
     def matchingParentheses(self) -> List[Tuple[int, int]]:
         """
-        Finds pairs of matching parenthesis and returns starting and ending index of each pair.
+        Finds pairs of matching parenthesis and returns starting and ending index of each pair,
+        in order of ending index.
         If detects mismatches, return None
         """
-        queue = []
-        res = []
-        for i, (symbolType, *symbol) in enumerate(self):
-            if not symbolType == 'bracket':
-                continue
-            if symbol == ['(',]:
-                queue.append(i)
-            if symbol == [')',]:
-                if len(queue) == 0:
-                    return None
-                res.append((queue.pop(), i))
-        if len(queue) > 0:
+        table = self.bracketTable()
+        if table is None:
             return None
-        return res
+        return [(opening, closing) for closing, opening in enumerate(table) if 0 <= opening < closing]
 
     def substitute(
             self,
@@ -684,15 +1158,12 @@ class Statement:
         When the result is not well-formed, return None
         Overlapping also returns None
         """
-        map = {sym: sym for sym in self.syms()}
-        map.update(startingMap)
-        if mappableCheck and not mappableDict(map): return None
-        res = Statement(tuple(map.get(symbol, symbol) for symbol in self))
-        if obj:
-            if not res.wellformedobj(): return None
-        else:
-            if not res.wellformed(): return None
-        return res
+        if mappableCheck:
+            #Same as checking the map over all symbols, where unmapped symbols map to themselves
+            if not mappableDict(startingMap): return None
+            unmapped = self.syms() - startingMap.keys()
+            if any(sym in unmapped for sym in startingMap.values()): return None
+        return self.rewrite({fro: (to,) for fro, to in startingMap.items()}, obj)
 
     def complexSubstitute(
             self,
@@ -704,89 +1175,212 @@ class Statement:
         and return the resulting statement.
         When the result is not well-formed, return None
         """
-        mapPlace = {}
-        indexAdd = 0
-        for fro, tos in startingMap.items(): #Each types of occurence
-            for i, val in enumerate(self):
-                if val == fro: #If found occurence, change it
-                    mapPlace[i + indexAdd] = tos
-                    indexAdd += len(tos) - 1
-        listSymbols = list(deepcopy(self.statement))
-        for ind, val in sorted(mapPlace.items(), key=lambda x: x[0]):
-            listSymbols[ind:ind+1] = val
-        res = deepcopy(self)
-        res.statement = tuple(listSymbols)
-        if obj:
-            if not res.wellformedobj(): return None
-        else:
-            if not res.wellformed(): return None
+        return self.rewrite(startingMap, obj)
+
+    def rewrite(
+            self,
+            startingMap: dict[Tuple, Sequence[Tuple]],
+            obj: bool = False,
+            validate: bool = True
+        ) -> 'Statement | None':
+        """
+        Replaces each occurence of a symbol in the map with its tokens in one pass,
+        and return the resulting statement.
+        Only the positions of the symbols (see seqIndex) are visited, copying the tokens between them.
+        When the result is not well-formed, return None.
+        If validate is False, the result is trusted to be a WFO (obj is True) or WFF (obj is False) and returned unchecked.
+        """
+        positions = self.seqIndex().positions
+        tokens = []
+        previous = 0
+        for position in sorted(position for symbol in startingMap for position in positions.get(symbol, ())):
+            tokens.extend(self[previous:position])
+            tokens.extend(startingMap[self[position]])
+            previous = position + 1
+        tokens.extend(self[previous:])
+        res = Statement(tuple(tokens))
+        if not validate:
+            object.__setattr__(res, '_wellformedKind', obj)
+        elif res.wellformedKind() is not obj:
+            return None
         return res
 
+    def instantiate(self, symbol: Tuple, term: 'Statement', obj: bool = False) -> 'Statement | None':
+        """
+        Replaces each occurence of the symbol with the term, like complexSubstitute({symbol: tuple(term)}).
+        """
+        return self.instantiateMany(symbol, (term,), obj)[0]
+
+    def instantiateMany(
+            self,
+            symbol: Tuple,
+            terms: Iterable['Statement'],
+            obj: bool = False
+        ) -> Tuple['Statement | None', ...]:
+        """
+        Replaces each occurence of the symbol with each of the terms, like instantiate for each term, in input order.
+        The statement is split at the symbol once.
+        If the statement is a WFO/WFF where the symbol only occurs as an atomic object,
+        results for WFO terms are well-formed, so they are not validated.
+        """
+        return self._fill(symbol, self.positionsOf(symbol), terms, obj)
+
+    def _fill(
+            self,
+            symbol: Tuple,
+            positions: Sequence[int],
+            terms: Iterable['Statement'],
+            obj: bool
+        ) -> Tuple['Statement | None', ...]:
+        #Replaces the symbol at the positions with each of the terms
+        pieces = []
+        previous = 0
+        for position in positions:
+            pieces.append(self[previous:position])
+            previous = position + 1
+        pieces.append(self[previous:])
+        #In a WFO/WFF, a var is an atom unless it names a function or is bound by a quantifier
+        atomic = symbol[0] in varFuncSymbols and self.wellformedKind() is obj and not any(
+            (position + 1 < len(self) and self[position + 1] == ('bracket', '(')) or
+            (position >= 2 and self[position - 2][0] == 'quanti')
+            for position in positions
+        )
+        results = []
+        for term in terms:
+            tokens = list(pieces[0])
+            for piece in pieces[1:]:
+                tokens.extend(term)
+                tokens.extend(piece)
+            res = Statement(tokens)
+            if atomic and term.wellformedKind() is True:
+                object.__setattr__(res, '_wellformedKind', obj)
+            elif res.wellformedKind() is not obj:
+                res = None
+            results.append(res)
+        return tuple(results)
+
+    def scopes(self) -> Tuple[QuantifierScope, ...] | None:
+        """
+        Returns the quantifier binders of the WFF/WFO in order of position, or None if ill-formed.
+        Each occurence of a var is bound by the innermost binder of it around the occurence.
+        Built once from the bracket table and the symbol positions, and cached on the statement.
+        """
+        table = self._derived('_scopes', self._findScopes)
+        return None if table is None else table[0]
+
+    def _findScopes(self) -> Tuple[Tuple[QuantifierScope, ...], Mapping[Tuple, Tuple[int, ...]]] | None:
+        #Binders, and free positions of each var with a binder, found in one pass over the positions of those vars
+        if self.wellformedKind() is None:
+            return None
+        binders = sorted(self.positionsOf(('quanti', 'forall')) + self.positionsOf(('quanti', 'exists')))
+        bound = {binder: [] for binder in binders}
+        byVar = {}
+        for binder in binders:
+            byVar.setdefault(self[binder + 2], []).append(binder)
+        free = {}
+        for var, varBinders in byVar.items():
+            #Binders of the same var around the current position, innermost last
+            opened = []
+            nextBinder = 0
+            varFree = []
+            for position in self.positionsOf(var):
+                while nextBinder < len(varBinders) and varBinders[nextBinder] < position:
+                    opened.append(varBinders[nextBinder])
+                    nextBinder += 1
+                while opened and self.matchingBracket(opened[-1] - 1) < position:
+                    opened.pop()
+                if not opened:
+                    varFree.append(position)
+                elif position != opened[-1] + 2:
+                    bound[opened[-1]].append(position)
+            free[var] = tuple(varFree)
+        scopes = tuple(
+            QuantifierScope(
+                self[binder][1], self[binder + 2],
+                binder - 1, self.matchingBracket(binder - 1) + 1,
+                tuple(bound[binder])
+            )
+            for binder in binders
+        )
+        return (scopes, MappingProxyType(free))
+
+    def freePositions(self, symbol: Tuple) -> Tuple[int, ...] | None:
+        """
+        Returns the positions of the symbol not bound by a quantifier, or None if ill-formed.
+        Only vars with a binder have bound positions, kept from building the scopes.
+        """
+        table = self._derived('_scopes', self._findScopes)
+        if table is None:
+            return None
+        return table[1].get(symbol, self.positionsOf(symbol))
+
+    def freeVars(self) -> Set[Tuple[str, ...]] | None:
+        """
+        Returns the vars with an occurence not bound by a quantifier, or None if ill-formed.
+        Vars are the symbols a quantifier can bind (varSymbols), game function names included.
+        """
+        table = self._derived('_scopes', self._findScopes)
+        if table is None:
+            return None
+        return set(self._derived('_freeVars', lambda: frozenset(
+            sym for sym, positions in self.symbolPositions().items()
+            if sym[0] in varSymbols and table[1].get(sym, positions)
+        )))
+
+    def instantiateFree(self, symbol: Tuple, term: 'Statement', obj: bool = False) -> 'Statement | None':
+        """
+        Replaces the occurences of the symbol not bound by a quantifier with the term,
+        keeping bound occurences.
+        Returns None if a quantifier around a replaced occurence would bind a var of the term,
+        or if the result is not well-formed.
+        """
+        positions = self.freePositions(symbol)
+        if positions is None:
+            return None
+        termVars = term.freeVars()
+        if termVars is None:
+            termVars = term.syms()
+        for scope in self.scopes():
+            if scope.var in termVars:
+                #Positions are sorted, so only the first one after the binder start needs checking
+                index = bisect_left(positions, scope.start)
+                if index < len(positions) and positions[index] < scope.end:
+                    return None
+        return self._fill(symbol, positions, (term,), obj)[0]
+
     def symbolPoint(self) -> int:
         """
         Return symbol point of this statement.
         """
-        res = 0
-        for symType, *_ in self:
-            if symType in ['truth', 'bracket', 'comma']: continue
-            elif symType in ['quanti', 'distVar', 'distPred']: res += 2
-            elif symType in ['gameFuncName', 'predGFuncName']: res += 4
-            elif symType in ['predAFuncName']: res += 8
-            else: res += 1
-        return res
+        return self._derived('_symbolPoint', lambda: sum(symbolPoints.get(symType, 1) for symType, *_ in self))
 
     def deterministic(self, obj: bool | None = False) -> bool:
         """
         Checks if the statement is deterministic or not.
         Needs to be WFF/WFO else this will raise an error.
+        Looked up from the attributes of the statement (see attributes).
         """
         if obj is None:
             if not (self.wellformedobj() or self.wellformed()): raise ValueError('Not a well-formed object/formula')
         else:
             if obj and not self.wellformedobj(): raise ValueError('Not a well-formed object')
             if (not obj) and not self.wellformed(): raise ValueError('Not a well-formed formula')
-        if self.simple(obj): return True
-        if self.functionArgs():
-            if obj and not self[0][0] == 'gameFuncName': return False
-            if (not obj) and not self[0][0] in ('predGFuncName', 'predAFuncName'): return False
-            if all(param.deterministic(True) for param in self.functionArgs()):
-                return True
-        if self.operatorArgs() and \
-        all(param.deterministic(None) for param in self.operatorArgs()):
-            return True
-        return False
+        attributes = self.attributes()
+        return attributes.deterministicAny if obj is None else attributes.deterministic
 
     def simple(self, obj: bool | None = False) -> bool:
         """
         Checks if the statement is simple or not.
         Needs to be WFF/WFO else this will raise an error.
+        Looked up from the attributes of the statement (see attributes).
         """
         if obj is None:
             if not (self.wellformedobj() or self.wellformed()): raise ValueError('Not a well-formed object/formula')
         else:
             if obj and not self.wellformedobj(): raise ValueError('Not a well-formed object')
             if (not obj) and not self.wellformed(): raise ValueError('Not a well-formed formula')
-
-        if obj or obj is None:
-            if len(self) == 1 and self[0][0] in unPureVar: return True
-            if len(self) >= 3 and self[0][0] == 'gameFuncName' and self[1] == ('bracket', '(') and \
-            all(sym[0] in unPureVar for sym in self[2::2]):
-                return True
-            if len(self) == 5 and self[1][0] in unPureVar and self[2][0] == 'oper' and self[3][0] in unPureVar:
-                return True
-        if (not obj) or obj is None:
-            if len(self) == 1 and self[0][0] in unPurePred: return True
-            if len(self) >= 3 and self[0][0] in ('predGFuncName', 'predAFuncName') and self[1] == ('bracket', '(') and \
-            all(sym[0] in unPureVar for sym in self[2::2]):
-                return True
-            if len(self) == 5 and self[1][0] in unPureVar and self[2][0] == 'compare' and self[3][0] in unPureVar:
-                return True
-            if len(self) == 5 and self[1][0] in unPureVar and self[2][0] == 'equal' and self[3][0] in unPureVar:
-                return True
-            if len(self) == 5 and self[1][0] in unPurePred and self[2][0] == 'connect' and self[3][0] in unPurePred:
-                return True
-
-        return False
+        attributes = self.attributes()
+        return attributes.simpleAny if obj is None else attributes.simple
 
 
     def operatorArgs(self)-> Tuple['Statement', 'Statement'] | None:
@@ -794,93 +1388,20 @@ class Statement:
         Returns args of operator/connective/comparative/equality statement.
         Returns None if not operator/connective/comparative/equality statement.
         """
-        res = self.formulasInForm((
-            ('bracket', '('),
-        ), (
-            ('bracket', ')'),
-        ), (
-            ('equal',),
-        ),
-        opt1obj=True,
-        opt2obj=True)
-        if res is not None: return res[0]
-        for op in opers:
-            res = self.formulasInForm((
-                ('bracket', '('),
-            ), (
-                ('bracket', ')'),
-            ), (
-                ('oper', op),
-            ),
-            opt1obj=True,
-            opt2obj=True)
-            if res is not None: return res[0]
-        for con in connects:
-            res = self.formulasInForm((
-                ('bracket', '('),
-            ), (
-                ('bracket', ')'),
-            ), (
-                ('connect', con),
-            ))
-            if res is not None: return res[0]
-        for com in compares:
-            res = self.formulasInForm((
-                ('bracket', '('),
-            ), (
-                ('bracket', ')'),
-            ), (
-                ('compare', com),
-            ),
-            opt1obj=True,
-            opt2obj=True)
-            if res is not None: return res[0]
-        return None
+        tree = self.syntaxTree()
+        if tree is None or not tree.binary():
+            return None
+        return self._childViews(tree.children)
+
     def operatorSymbol(self)-> Tuple[str, ...] | None:
         """
         Returns operator symbol of operator/connective/comparative/equality statement.
         Returns None if not operator/connective/comparative/equality statement.
         """
-        if self.form((
-            ('bracket', '('),
-        ), (
-            ('bracket', ')'),
-        ), (
-            ('equal',),
-        ),
-        opt1obj=True,
-        opt2obj=True): return ('equal',)
-        for op in opers:
-            if self.form((
-                ('bracket', '('),
-            ), (
-                ('bracket', ')'),
-            ), (
-                ('oper', op),
-            ),
-            opt1obj=True,
-            opt2obj=True): return ('oper', op)
-        for con in connects:
-            if self.form((
-                ('bracket', '('),
-            ), (
-                ('bracket', ')'),
-            ), (
-                ('connect', con),
-            ),
-            opt1obj=False,
-            opt2obj=False): return ('connect', con)
-        for com in compares:
-            if self.form((
-                ('bracket', '('),
-            ), (
-                ('bracket', ')'),
-            ), (
-                ('compare', com),
-            ),
-            opt1obj=True,
-            opt2obj=True): return ('compare', com)
-        return None
+        tree = self.syntaxTree()
+        if tree is None or not tree.binary():
+            return None
+        return self[tree.head]
 
     @staticmethod
     def calcFunction(
@@ -893,21 +1414,288 @@ class Statement:
         """
         match name:
             case '[NUMBER]':
-                if args[0][0] == 'number':
-                    return Statement.lex('tT')
-                else:
-                    return Statement.lex('tF')
+                return StatementBuilder().truth(args[0][0] == 'number').build()
             case '[PLAYER]':
-                if args[0][0] == 'player':
-                    return Statement.lex('tT')
-                else:
-                    return Statement.lex('tF')
+                return StatementBuilder().truth(args[0][0] == 'player').build()
             case '[CARD]':
-                if args[0][0] == 'card':
-                    return Statement.lex('tT')
-                else:
-                    return Statement.lex('tF')
+                return StatementBuilder().truth(args[0][0] == 'card').build()
             case _:
                 return originalState #Keep your input, bro
 
-baseRules = tuple(Statement.lex(rule.statement) for rule in getBaseRules())
+class StatementView(Statement):
+    """
+    A statement made of tokens start to end (exclusive) of a parent token tuple, sharing it instead of copying.
+    The tokens are only copied when the statement attribute is used.
+    """
+    __slots__ = ('buffer', 'start', 'end', '_tokens')
+
+    def __init__(self, buffer: Tuple[Tuple, ...], start: int, end: int):
+        object.__setattr__(self, 'buffer', buffer)
+        object.__setattr__(self, 'start', start)
+        object.__setattr__(self, 'end', end)
+
+    @property
+    def statement(self) -> Tuple[Tuple, ...]:
+        return self._derived('_tokens', lambda: self.buffer[self.start:self.end])
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return tuple(map(self.buffer.__getitem__, range(self.start, self.end)[key]))
+        return self.buffer[range(self.start, self.end)[key]]
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __iter__(self) -> Iterator[Tuple]:
+        return map(self.buffer.__getitem__, range(self.start, self.end))
+
+    def _buffer(self) -> Tuple[Tuple[Tuple, ...], int]:
+        return (self.buffer, self.start)
+
+    def intern(self) -> Statement:
+        return Statement(self.statement).intern()
+
+class StatementForm:
+    """
+    A statement form [start..., opt1, mid..., opt2, end...], compiled once and matched in one pass.
+    start and end match up to renaming of vars and preds, mid matches exactly.
+    opt1 and opt2 must be WFOs if opt1obj/opt2obj, else WFFs (opt2 only exists with mid).
+    """
+    def __init__(
+            self,
+            start: Tuple[Tuple, ...] = (),
+            end: Tuple[Tuple, ...] = (),
+            mid: Tuple[Tuple, ...] = (),
+            opt1obj: bool = False,
+            opt2obj: bool = False
+        ):
+        if mid[:1] == (('bracket', '('),):
+            raise ValueError('mid must not start with a bracket')
+        self.start = tuple(start)
+        self.end = tuple(end)
+        self.mid = tuple(mid)
+        self.opt1obj = opt1obj
+        self.opt2obj = opt2obj
+        #Symbol class of each start and end token, if renamable
+        self.affixClasses = tuple(
+            varSymbols if token[0] in varSymbols else predSymbols if token[0] in predSymbols else None
+            for token in self.start + self.end
+        )
+
+    def affixesMatch(self, statement: Statement) -> bool:
+        """
+        Checks if the statement starts with start and ends with end, up to renaming.
+        """
+        maps = {}
+        endOffset = len(statement) - len(self.end) - len(self.start)
+        for index, (token, symClass) in enumerate(zip(self.start + self.end, self.affixClasses)):
+            actual = statement[index if index < len(self.start) else index + endOffset]
+            if symClass is None:
+                if actual != token:
+                    return False
+            elif actual[0] not in symClass or maps.setdefault(actual, token) != token:
+                return False
+        return mappableDict(maps)
+
+    def match(self, statement: Statement) -> Tuple[Statement, ...] | None:
+        """
+        Returns (opt1,) or (opt1, opt2) of the statement as views, or None if it does not fit.
+        """
+        start, end = len(self.start), len(statement) - len(self.end)
+        #As in formulasInForm, an empty end fits no statement
+        if not self.end or end <= start or not self.affixesMatch(statement):
+            return None
+        if not self.mid:
+            formula = statement.view(start, end)
+            return (formula,) if formula.wellformedKind() is self.opt1obj else None
+        #Well-formed formulas can't continue into mid, so the first one is the only candidate for opt1
+        buffer, offset = statement._buffer()
+        try:
+            obj, split = SyntaxParser(buffer, offset + start, end - start).scan()
+        except SyntaxParseError:
+            return None
+        split += start
+        if obj != self.opt1obj or split + len(self.mid) >= end or statement[split:split + len(self.mid)] != self.mid:
+            return None
+        formula = statement.view(split + len(self.mid), end)
+        if formula.wellformedKind() is not self.opt2obj:
+            return None
+        return (statement.view(start, split), formula)
+
+    def fits(self, statement: Statement) -> bool:
+        return self.match(statement) is not None
+
+@lru_cache(maxsize=256)
+def compileForm(
+        start: Tuple[Tuple, ...] = (),
+        end: Tuple[Tuple, ...] = (),
+        mid: Tuple[Tuple, ...] = (),
+        opt1obj: bool = False,
+        opt2obj: bool = False
+    ) -> StatementForm:
+    """
+    Returns the compiled statement form, compiling each distinct form once.
+    """
+    return StatementForm(start, end, mid, opt1obj, opt2obj)
+
+class StatementBuilder:
+    """
+    Assembles a statement from tokens and subformulas, allocating the result once on build.
+    """
+    def __init__(self, *parts: Statement | Tuple):
+        self.tokens: List[Tuple] = []
+        self.add(*parts)
+
+    def add(self, *parts: Statement | Tuple) -> 'StatementBuilder':
+        """
+        Appends statements, single tokens or sequences of tokens, in order.
+        """
+        for part in parts:
+            if isinstance(part, Statement):
+                self.tokens.extend(part.statement)
+            elif part and isinstance(part[0], str):
+                self.tokens.append(part)
+            else:
+                self.tokens.extend(part)
+        return self
+
+    def open(self) -> 'StatementBuilder':
+        self.tokens.append(('bracket', '('))
+        return self
+
+    def close(self, count: int = 1) -> 'StatementBuilder':
+        self.tokens.extend((('bracket', ')'),) * count)
+        return self
+
+    def connect(self, connective: str) -> 'StatementBuilder':
+        self.tokens.append(('connect', connective))
+        return self
+
+    def truth(self, value: bool) -> 'StatementBuilder':
+        self.tokens.append(('truth', 'tT' if value else 'tF'))
+        return self
+
+    def quanti(self, quantifier: str, var: Tuple) -> 'StatementBuilder':
+        """
+        Appends an opening of a quantified formula, which is closed by close().
+        """
+        self.tokens.extend((('bracket', '('), ('quanti', quantifier), ('bracket', '('), var, ('bracket', ')')))
+        return self
+
+    def function(self, name: Tuple, args: Iterable[Statement | Tuple]) -> 'StatementBuilder':
+        """
+        Appends a function with its arguments.
+        """
+        self.tokens.extend((name, ('bracket', '(')))
+        for index, arg in enumerate(args):
+            if index > 0:
+                self.tokens.append(('comma',))
+            self.add(arg)
+        self.tokens.append(('bracket', ')'))
+        return self
+
+    def __getitem__(self, key):
+        return self.tokens[key]
+
+    def __setitem__(self, key, value):
+        self.tokens[key] = value
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def build(self) -> Statement:
+        return Statement(tuple(self.tokens))
+
+def readStatements(
+        source: str | bytes | IO,
+        special: bool = False,
+        chunkSize: int = 65536
+    ) -> Iterator[Tuple[BRulesParseResult, Statement]]:
+    """
+    Yields ~...~ delimited statements of a string, bytes-like object, mmap or file object,
+    each with its parse result, lexing each one as soon as it is read.
+    """
+    for rule in iterParse(source, chunkSize):
+        yield rule, Statement.lex(rule.statement, special)
+
+compiledRulesMagic = b'PWRC1'
+
+def _compiledRulesDigest(source: bytes) -> bytes:
+    """
+    Hashes rule file content together with everything that decides its lexed form.
+    """
+    digest = hashlib.sha256(compiledRulesMagic)
+    digest.update(repr((
+        marshal.version, lexerVersion, symbolsType, specialSymbolsType, lexRegex.pattern, specialLexRegex.pattern
+    )).encode('utf-8'))
+    digest.update(source)
+    return digest.digest()
+
+def _readCompiledRules(cachePath: str, digest: bytes) -> Tuple[Tuple[Tuple, ...], ...] | None:
+    try:
+        with open(cachePath, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    header = compiledRulesMagic + digest
+    if not data.startswith(header):
+        return None
+    try:
+        tokens, rules = marshal.loads(data[len(header):])
+        return tuple(tuple(tokens[index] for index in rule) for rule in rules)
+    except (EOFError, ValueError, TypeError, IndexError):
+        return None
+
+def _writeCompiledRules(cachePath: str, digest: bytes, rules: Tuple[Tuple[Tuple, ...], ...]) -> None:
+    #Each distinct token is stored once, rules are stored as indexes of tokens
+    tokenIndexes = {}
+    indexedRules = tuple(
+        tuple(tokenIndexes.setdefault(token, len(tokenIndexes)) for token in rule)
+        for rule in rules
+    )
+    data = compiledRulesMagic + digest + marshal.dumps((tuple(tokenIndexes), indexedRules))
+    try:
+        fd, tempPath = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(cachePath)))
+    except OSError:
+        return #Compiled rules are only a cache
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tempPath, cachePath)
+    except OSError:
+        try:
+            os.unlink(tempPath)
+        except OSError:
+            pass
+
+_baseRulesPath = None
+
+def loadBaseRules(path: str | None = None, cachePath: str | None = None) -> Tuple[Statement, ...]:
+    """
+    Returns lexed base rules of the rule file (default: set by setBaseRulesPath, else baserules.getBaseRulesPath()).
+    Loads them from the compiled rule file (default: same name with .pwrc extension)
+    if it was compiled from the same content, else lexes the rule file and recompiles it.
+    """
+    if path is None:
+        path = getBaseRulesPath() if _baseRulesPath is None else _baseRulesPath
+    if cachePath is None:
+        cachePath = os.path.splitext(path)[0] + '.pwrc'
+    with open(path, 'rb') as f:
+        source = f.read()
+    digest = _compiledRulesDigest(source)
+    rules = _readCompiledRules(cachePath, digest)
+    if rules is None:
+        rules = tuple(state.statement for _, state in readStatements(source))
+        _writeCompiledRules(cachePath, digest, rules)
+    return tuple(Statement(rule).intern() for rule in rules)
+
+def setBaseRulesPath(path: str | None) -> None:
+    """
+    Sets the rule file baseRules is loaded from (None: baserules.getBaseRulesPath()).
+    baseRules is loaded again on next access.
+    """
+    global _baseRulesPath
+    _baseRulesPath = path
+    baseRules.reset()
+
+baseRules = LazySequence(loadBaseRules)
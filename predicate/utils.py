@@ -12,6 +12,8 @@
 
 # You should have received a copy of the GNU General Public License along
 # with Predicate Wars. If not, see <https://www.gnu.org/licenses/>.
+import atexit
+from bisect import bisect_left, bisect_right
 from copy import deepcopy
 from dataclasses import dataclass, field
 from enum import Enum
@@ -19,7 +21,8 @@ from itertools import combinations
 import math
 import random
 import re
-from typing import Any, Callable, List, Optional, Sequence, Set, Tuple
+from types import MappingProxyType
+from typing import Any, Callable, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
 
 def mappableDict(dct: dict) -> bool:
     """
@@ -27,11 +30,56 @@ def mappableDict(dct: dict) -> bool:
     """
     return len(set(dct.values())) == len(dct.values())
 
-def checkSubSeq(subseq: Sequence, seq: Sequence) -> bool:
+class SeqIndex:
+    """
+    Positions of each element of a sequence, built once for repeated subsequence searches.
+    Searches look up positions of the rarest element of the subsequence, without copying the sequence.
+    """
+    def __init__(self, seq: Sequence):
+        self.seq = seq
+        positions: dict[Any, List[int]] = {}
+        for index, elem in enumerate(seq):
+            positions.setdefault(elem, []).append(index)
+        #Read-only, as it is shared by everything searching the sequence
+        self.positions: Mapping[Any, Tuple[int, ...]] = MappingProxyType(
+            {elem: tuple(indexes) for elem, indexes in positions.items()}
+        )
+
+    def iterIndexes(self, subseq: Sequence, start: int = 0, end: int | None = None) -> Iterable[int]:
+        """
+        Yields starting indexes of the subsequence in seq[start:end] (non-negative bounds), in order.
+        """
+        end = len(self.seq) if end is None else min(end, len(self.seq))
+        if len(subseq) == 0:
+            yield from range(start, end + 1)
+            return
+        anchor = min(range(len(subseq)), key=lambda i: len(self.positions.get(subseq[i], ())))
+        positions = self.positions.get(subseq[anchor], ())
+        for position in range(
+                bisect_left(positions, start + anchor),
+                bisect_right(positions, end - len(subseq) + anchor)
+            ):
+            index = positions[position] - anchor
+            if all(self.seq[index + offset] == elem for offset, elem in enumerate(subseq)):
+                yield index
+
+    def indexes(self, subseq: Sequence, start: int = 0, end: int | None = None) -> Tuple[int, ...]:
+        return tuple(self.iterIndexes(subseq, start, end))
+
+    def contains(self, subseq: Sequence, start: int = 0, end: int | None = None) -> bool:
+        return next(iter(self.iterIndexes(subseq, start, end)), None) is not None
+
+def _innerBounds(seq: Sequence, start: Sequence, end: Sequence) -> Tuple[int, int]:
+    #Bounds of seq[len(start):-len(end)], which is empty for empty end
+    return len(start), len(seq) - len(end) if len(end) else 0
+
+def checkSubSeq(subseq: Sequence, seq: Sequence, seqIndex: SeqIndex | None = None) -> bool:
     #From https://stackoverflow.com/questions/425604/best-way-to-determine-if-a-sequence-is-in-another-sequence
     """
     Return if the subsequence is in the sequence.
+    Uses the index of the sequence if given.
     """
+    if seqIndex is not None: return seqIndex.contains(subseq)
     i, n, m = -1, len(seq), len(subseq)
     if len(subseq) == 0: return True
     try:
@@ -42,11 +90,13 @@ def checkSubSeq(subseq: Sequence, seq: Sequence) -> bool:
     except ValueError:
         return False
 
-def subSeqIndexes(subseq: Sequence, seq: Sequence) -> Tuple[int]:
+def subSeqIndexes(subseq: Sequence, seq: Sequence, seqIndex: SeqIndex | None = None) -> Tuple[int]:
     #From https://stackoverflow.com/questions/425604/best-way-to-determine-if-a-sequence-is-in-another-sequence
     """
     Return starting indexes of the subsequence in the sequence.
+    Uses the index of the sequence if given.
     """
+    if seqIndex is not None: return seqIndex.indexes(subseq)
     i, n, m = -1, len(seq), len(subseq)
     matches = []
     try:
@@ -62,13 +112,18 @@ def checkSeqForm(
         start: Sequence,
         end: Sequence,
         mid: Sequence=(),
-        startEndMatch = lambda x, y: x == y
+        startEndMatch = lambda x, y: x == y,
+        seqIndex: SeqIndex | None = None
     ) -> bool:
     """
     Check the sequence if it is the form of [start..., ?, mid..., ?, end...].
+    Searches mid with the index of the sequence if given.
     """
     if not startEndMatch(seq[:len(start)], start): return False
     if not startEndMatch(seq[-len(end):], end): return False
+    if seqIndex is not None:
+        innerStart, innerEnd = _innerBounds(seq, start, end)
+        return len(mid) == 0 or seqIndex.contains(mid, innerStart, innerEnd)
     if not checkSubSeq(mid, seq[len(start):-len(end)]): return False
     return True
 
@@ -78,26 +133,77 @@ def seqFormOptionalsIndexes(
         end: Sequence,
         mid: Sequence = (),
         midcond: Callable[[int], bool] = lambda x: True,
-        startEndMatch = lambda x, y: x == y
+        startEndMatch = lambda x, y: x == y,
+        seqIndex: SeqIndex | None = None
     ) -> Tuple[Tuple, ...] | None:
     """
     Return indexes of optional subsequences in the sequence of the seq form.
     ((subseq1start, subseq2end), ((subseq1end, subseq2start),...)?)
     Conditional function of mid filter is fed starting index to each mid
+    Searches mid with the index of the sequence if given.
     """
-    if checkSeqForm(seq, start, end, mid, startEndMatch):
+    if checkSeqForm(seq, start, end, mid, startEndMatch, seqIndex):
         if len(mid) == 0:
             return ((len(start), len(seq) - len(end)),)
         else:
             return ((len(start), len(seq) - len(end)),
                 tuple(
                     (index + len(start), index + len(start) + len(mid))
-                    for index in subSeqIndexes(mid, seq[len(start):-len(end)])
+                    for index in (
+                        subSeqIndexes(mid, seq[len(start):-len(end)]) if seqIndex is None
+                        else tuple(i - len(start) for i in seqIndex.iterIndexes(mid, *_innerBounds(seq, start, end)))
+                    )
                     if midcond(index + len(start))
                 )
             )
     return None
 
+_processPool = None
+_processPoolSize = 0
+
+def getProcessPool(processes: int):
+    """
+    Returns the shared pool of processes used by chunkedMap, created on first use.
+    The pool is replaced if a different number of processes is asked for.
+    """
+    global _processPool, _processPoolSize
+    if _processPool is None or _processPoolSize != processes:
+        from concurrent.futures import ProcessPoolExecutor #Deferred, costly to import and rarely needed
+        shutdownProcessPool()
+        _processPool = ProcessPoolExecutor(processes)
+        _processPoolSize = processes
+    return _processPool
+
+def shutdownProcessPool() -> None:
+    """
+    Stops the shared pool of processes, if any. A later chunkedMap starts a new one.
+    """
+    global _processPool, _processPoolSize
+    if _processPool is not None:
+        _processPool.shutdown()
+    _processPool, _processPoolSize = None, 0
+
+atexit.register(shutdownProcessPool)
+
+def chunkedMap(
+        func: Callable[[Any], Any],
+        items: Sequence,
+        processes: int | None = None,
+        chunksize: int = 64,
+        executor = None
+    ) -> List:
+    """
+    Maps the function over the items, keeping input order.
+    Uses the given executor, or else the shared pool of processes (see getProcessPool) if processes > 1,
+    sending items in chunks, if items fill more than one chunk.
+    The function and items must be picklable then.
+    """
+    if len(items) <= chunksize or (executor is None and (processes is None or processes <= 1)):
+        return [func(item) for item in items]
+    if executor is None:
+        executor = getProcessPool(processes)
+    return list(executor.map(func, items, chunksize=chunksize))
+
 def smallestMissingInteger(sequence: Sequence[int], ground=0, default=0) -> int:
     if len(sequence) == 0:
         return default
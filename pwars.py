@@ -23,7 +23,7 @@ import types
 from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from predicate.statement import baseRules, symbolsType
-from predicate.proof import Proof, ProofBase, StateTag, Statement
+from predicate.proof import Proof, ProofBase, StateTag, Statement, StatementBuilder, equalForm
 from predicate.utils import doOperator
 from utilclasses import LazyDict
 
@@ -48,12 +48,6 @@ def _allUnique(iter: Iterable, key: Callable = lambda x: x) -> bool:
     seenKeys = list()
     return not any(key(i) in seenKeys or seenKeys.append(key(i)) for i in iter)
 
-def _mergeItersWithDelimiter(iters: Iterable[Iterable], delimiter: Any):
-    for i, itera in enumerate(iters):
-        if i > 0: yield delimiter
-        for elem in itera:
-            yield elem
-
 #Temporary name?
 FAIR_NUMBER = 8
 
@@ -448,26 +442,21 @@ class PWars:
             res = state.functionArgs()
             if res is not None:
                 return PWars.convert(
-                    Statement(Statement(state[0:1]) + Statement.lex('(') + \
-                    Statement(
-                        tuple(_mergeItersWithDelimiter(
-                            (PWars.calcStatement(
-                                arg, obj,
-                                calcInstance,
-                                conversion=False
-                            ) for arg in res),
-                            Statement.lex(',')
-                        ))
-                    ) + \
-                    Statement.lex(')')), calcInstance, conversion)
+                    StatementBuilder().function(state[0], (
+                        PWars.calcStatement(
+                            arg, obj,
+                            calcInstance,
+                            conversion=False
+                        ) for arg in res
+                    )).build(), calcInstance, conversion)
             res = state.operatorArgs()
             if res is not None:
                 res = PWars.calcSimple(
-                    Statement.lex('(') + \
-                    PWars.calcStatement(res[0], obj=None, calcInstance=calcInstance, conversion=False) + \
-                    Statement((state.operatorSymbol(), )) + \
-                    PWars.calcStatement(res[1], obj=None, calcInstance=calcInstance, conversion=False) + \
-                    Statement.lex(')'),
+                    StatementBuilder().open().add(
+                        PWars.calcStatement(res[0], obj=None, calcInstance=calcInstance, conversion=False),
+                        state.operatorSymbol(),
+                        PWars.calcStatement(res[1], obj=None, calcInstance=calcInstance, conversion=False),
+                    ).close().build(),
                     obj=obj,
                     calcInstance=calcInstance,
                     conversion=conversion
@@ -497,21 +486,9 @@ class PWars:
 
         mapper = {True: 'tT', False: 'tF'}
 
-        try: res = state.formulasInForm(
-            (
-                ('bracket', '('),
-            ), (
-                ('bracket', ')'),
-            ), (
-                ('equal',),
-            ),
-            opt1obj=True,
-            opt2obj=True,
-        )[0]
-        except TypeError: pass
-        else:
-            if res is not None:
-                return Statement((('truth', mapper[tuple(res[0]) == tuple(res[1])],),))
+        res = equalForm.match(state)
+        if res is not None:
+            return Statement((('truth', mapper[tuple(res[0]) == tuple(res[1])],),))
         res = state.operatorArgs()
         if res is not None:
             num1, num2, oper = res[0][0][1], res[1][0][1], state.operatorSymbol()[1]
@@ -599,20 +576,11 @@ class PWars:
                 else:
                     return originalState
             case '[NUMBER]':
-                if args[0][0] == 'number':
-                    return Statement.lex('tT')
-                else:
-                    return Statement.lex('tF')
+                return StatementBuilder().truth(args[0][0] == 'number').build()
             case '[PLAYER]':
-                if args[0][0] == 'player':
-                    return Statement.lex('tT')
-                else:
-                    return Statement.lex('tF')
+                return StatementBuilder().truth(args[0][0] == 'player').build()
             case '[CARD]':
-                if args[0][0] == 'card':
-                    return Statement.lex('tT')
-                else:
-                    return Statement.lex('tF')
+                return StatementBuilder().truth(args[0][0] == 'card').build()
             case _:
                 return originalState #Keep your input, bro
 
@@ -622,32 +590,35 @@ class PWars:
         Expand special symbols of the statement to normal ones.
         """
         if conversion:
-            res = list(state.statement)
+            res = StatementBuilder()
 
-            i = 0
-            while i < len(res):
-                symbol = res[i]
+            for symbol in state:
                 if symbol[0] == 'player':
                     if int(symbol[1]) in calcInstance.chosenPlayer.values():
-                        res[i:i+1] = \
-                            Statement.lex(f'[chosenPlayer]({next(k for k, v in calcInstance.chosenPlayer.items() if v == int(symbol[1]))})').statement
+                        res.function(('gameFuncName', '[chosenPlayer]'), (
+                            ('number', str(next(k for k, v in calcInstance.chosenPlayer.items() if v == int(symbol[1])))),
+                        ))
                     elif int(symbol[1]) in calcInstance.randomPlayer.values():
-                        res[i:i+1] = \
-                            Statement.lex(f'[randomPlayer]({next(k for k, v in calcInstance.randomPlayer.items() if v == int(symbol[1]))})').statement
+                        res.function(('gameFuncName', '[randPlayer]'), (
+                            ('number', str(next(k for k, v in calcInstance.randomPlayer.items() if v == int(symbol[1])))),
+                        ))
                     else: raise ValueError('Cannot convert "player" symbol inside statement')
                 elif symbol[0] == 'card':
                     if int(symbol[1]) in calcInstance.chosenCard.values():
-                        res[i:i+1] = \
-                            Statement.lex(f'[chosenCard]({next(k for k, v in calcInstance.chosenCard.items() if v == int(symbol[1]))})').statement
+                        res.function(('gameFuncName', '[chosenCard]'), (
+                            ('number', str(next(k for k, v in calcInstance.chosenCard.items() if v == int(symbol[1])))),
+                        ))
                     elif int(symbol[1]) in calcInstance.randomCard.values():
-                        res[i:i+1] = \
-                            Statement.lex(f'[randomCard]({next(k for k, v in calcInstance.randomCard.items() if v == int(symbol[1]))})').statement
+                        res.function(('gameFuncName', '[randCard]'), (
+                            ('number', str(next(k for k, v in calcInstance.randomCard.items() if v == int(symbol[1])))),
+                        ))
                     else: raise ValueError('Cannot convert "card" symbol inside statement')
                 elif not symbol[0] in (sym[0] for sym in symbolsType):
                     raise ValueError('Cannot convert invalid symbol inside statement')
-                i += 1
+                else:
+                    res.add(symbol)
 
-            return res
+            return res.build()
         return state
 
     def genCalcInstance(
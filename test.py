@@ -12,12 +12,21 @@
 
 # You should have received a copy of the GNU General Public License along
 # with Predicate Wars. If not, see <https://www.gnu.org/licenses/>.
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
+from dataclasses import dataclass
 from typing import Any, Callable, Sequence, Tuple
+import io
+import random
 import sys
+import tempfile
+import tracemalloc
 import os
+import baserules as br
 import predicate as pd
 import pwars as pw
+from predicate.statement import predSymbols, varFuncSymbols, varSymbols
+from predicate.utils import checkSeqForm, mappableDict, seqFormOptionalsIndexes
 
 res: Any = None
 
@@ -92,6 +101,101 @@ test('seqFormOptionalsIndexes 2', res == ((3, 8), ((4, 6),)), res)
 res = pd.seqFormOptionalsIndexes((4,7,4,2,7,4,'er',3,9,9,9), (4,7,4), (9,9,9), (7,'er'))
 test('seqFormOptionalsIndexes 3', res is None, res)
 
+seq = (4,7,4,2,7,'er',4,3,7,'er',9,9,9)
+index = pd.SeqIndex(seq)
+res = (
+    index.indexes((7, 'er')), index.indexes((7, 'er'), 5), index.contains((4, 3, 7)), index.contains((9, 4)),
+    pd.seqFormOptionalsIndexes(seq, (4,7,4), (9,9,9), (7,'er'), seqIndex=index) == pd.seqFormOptionalsIndexes(seq, (4,7,4), (9,9,9), (7,'er')),
+)
+test('SeqIndex', res == ((4, 8), (8,), True, False, True), res)
+
+res = pd.Statement.lex('(forall(x_1)(P(x_1) and [ATK]($player:2$, (5 f/ 2))))', special=True)
+test('Statement.lex 1', res.statement == (
+    ('bracket', '('), ('quanti', 'forall'), ('bracket', '('), ('distVar', '24', '1'), ('bracket', ')'),
+    ('bracket', '('), ('pred', '16'), ('bracket', '('), ('distVar', '24', '1'), ('bracket', ')'),
+    ('connect', 'and'), ('predAFuncName', '[ATK]'), ('bracket', '('), ('player', '2'), ('comma',),
+    ('bracket', '('), ('number', '5'), ('oper', 'f/'), ('number', '2'), ('bracket', ')'),
+    ('bracket', ')'), ('bracket', ')'), ('bracket', ')'),
+), res)
+
+res = pd.Statement.lex('(not tT)' * 5000)
+test('Statement.lex 2', len(res) == 20000 and res[-3:] == (('connect', 'not'), ('truth', 'tT'), ('bracket', ')')), len(res))
+
+try:
+    pd.Statement.lex('(P and $card:1$)')
+except ValueError as err:
+    test('Statement.lex 3', str(err) == "Invalid string at '$card:1$)'", str(err))
+else:
+    test('Statement.lex 3', False, 'no err')
+
+cache = pd.setLexCache(2)
+state = pd.StatementBuilder(pd.Statement.lex('(P and Q)'))
+state[0] = ('bracket', ')')
+state.build()
+res = (pd.Statement.lex('(P and Q)'), pd.Statement.lex('R'), pd.Statement.lex('tT'), pd.Statement.lex('(P and Q)'))
+test('setLexCache 1', tuple(res[0]) == tuple(res[3]) == pd.Statement.lex('(P and Q)', special=True).statement, tuple(str(ree) for ree in res))
+test('setLexCache 2', cache.stats() == {'hits': 1, 'misses': 5, 'evictions': 3, 'size': 2, 'maxsize': 2}, cache.stats())
+pd.setLexCache(None)
+test('setLexCache 3', pd.getLexCache() is None, pd.getLexCache())
+
+cache = pd.setWellformedCache(2)
+res = (
+    pd.Statement.lex('(P and Q)').wellformed(), pd.Statement.lex('(P and Q)').wellformed(),
+    pd.Statement.lex('(P and').wellformed(), pd.Statement.lex('(P and').wellformedobj(), pd.Statement.lex('x').wellformedobj(),
+    pd.Statement.lex('(P and Q)').wellformed()
+)
+test('setWellformedCache 1', res == (True, True, False, False, True, True), res)
+test('setWellformedCache 2', cache.stats() == {'hits': 2, 'misses': 4, 'evictions': 2, 'size': 2, 'maxsize': 2}, cache.stats())
+pd.setWellformedCache(None)
+test('setWellformedCache 3', pd.getWellformedCache() is None, pd.getWellformedCache())
+
+res = []
+for string, obj in (('(P and Q)', None), ('(x + (P and Q))', None), ('P(x, y', None), ('x', False), ('(1 = 2) Q', None)):
+    error = pd.Statement.lex(string).diagnose(obj)
+    res.append(None if error is None else (error.index, error.expected))
+test('Statement.diagnose 1', res == [
+    None,
+    (3, 'object'),
+    (5, "',' or ')'"),
+    (0, 'formula'),
+    (5, 'end of statement'),
+], res)
+pd.setWellformedCache(8)
+pd.Statement.lex('(x + (P and Q))').wellformedKind()
+error = pd.Statement.lex('(x + (P and Q))').diagnose()
+pd.setWellformedCache(None)
+test('Statement.diagnose 2', (error.index, error.expected) == (3, 'object'), error)
+
+res = pd.Statement.lexMany(('P', '(x = 1)', 'P', '$player:0$'), special=True)
+test('Statement.lexMany 1', tuple(tuple(state) for state in res) == (
+    (('pred', '16'),),
+    (('bracket', '('), ('var', '24'), ('equal',), ('number', '1'), ('bracket', ')')),
+    (('pred', '16'),),
+    (('player', '0'),),
+), tuple(str(ree) for ree in res))
+
+res = pd.chunkedMap(len, ('a', 'bb', 'ccc'), processes=4, chunksize=8)
+test('chunkedMap 1', res == [1, 2, 3], res)
+pool = pd.getProcessPool(2)
+res = (pd.chunkedMap(len, ('a', 'bb', 'ccc'), processes=2, chunksize=1), pd.getProcessPool(2) is pool)
+pd.shutdownProcessPool()
+test('chunkedMap 2', res == ([1, 2, 3], True), res)
+with ThreadPoolExecutor(2) as executor:
+    res = pd.chunkedMap(len, ('a', 'bb', 'ccc'), chunksize=1, executor=executor)
+test('chunkedMap 3', res == [1, 2, 3], res)
+
+states = tuple(pd.Statement.lex(x) for x in ('P', '(x + 1)', '(P and', 'P', '(forall(x)P(x))'))
+res = (
+    pd.Statement.validateMany(states),
+    pd.Statement.validateMany(states, obj=True),
+    pd.Statement.validateMany(states * 40, obj=None, processes=2, chunksize=16)[:5],
+)
+test('Statement.validateMany', res == (
+    (True, False, False, True, True),
+    (False, True, False, False, False),
+    (True, True, False, True, True),
+), res)
+
 statements = tuple(pd.Statement.lex(x) for x in (
     """
     (forall(x)(
@@ -187,6 +291,17 @@ res = state.formulasInForm(
 )
 test('Statement.formulasInForm 3', res == ((pd.Statement.lex('f(x)'),),), False)
 
+form = pd.StatementForm(tuple(pd.Statement.lex('(forall(x)(')), tuple(pd.Statement.lex('))')), (('connect', 'imply'),))
+res = form.match(pd.Statement.lex('(forall(y_2)((P(y_2) and Q) imply R(y_2)))'))
+test('StatementForm 1', tuple(map(str, res)) == ('(P(y_2) and Q)', 'R(y_2)') and not form.fits(pd.Statement.lex('(forall(1)(P imply Q))')), res)
+form = pd.StatementForm((('bracket', '('),), (('bracket', ')'),), (('equal',),), opt1obj=True, opt2obj=True)
+res = (
+    tuple(map(str, form.match(pd.Statement.lex('(f(x, (1 + 2)) = y)')))),
+    form.match(pd.Statement.lex('(P = y)')),
+    pd.compileForm((('bracket', '('),), (('bracket', ')'),)) is pd.compileForm((('bracket', '('),), (('bracket', ')'),)),
+)
+test('StatementForm 2', res == (('f(x,(1+2))', 'y'), None, True), res)
+
 state = pd.Statement.lex('(f(x) = x)')
 res = state.matchingParentheses()
 test('Statement.matchingParentheses 1', set(res) == {(0, 7), (2, 4)}, res)
@@ -199,6 +314,11 @@ test('Statement.matchingParentheses 2',
 state = pd.Statement.lex('(s = ((2*6)+(2+55*(5+1)+(43)))')
 res = state.matchingParentheses()
 test('Statement.matchingParentheses 3', res == None, res)
+state = pd.Statement.lex('(f(x) = (x + 1))')
+res = (state.bracketTable(), state.matchingBracket(6), state.matchingBracket(1), pd.Statement.lex('f(x))').bracketTable())
+test('Statement.bracketTable', res == ((11, -1, 4, -1, 2, -1, 10, -1, -1, -1, 6, 0), 10, None, None), res)
+res = (state.matchingBracket(-1), state.matchingBracket(12), state.matchingBracket(11))
+test('Statement.matchingBracket', res == (None, None, 0), res)
 
 res = statements[0].substitute({
     ('var', '24'): ('var', '25'),
@@ -221,10 +341,101 @@ res = pd.Statement.lex('P(x)').complexSubstitute({
     ('var', '24'): (('var', '25'), ('bracket', '('), ('bracket', ')')),
 })
 test('Statement.complexSubstitute 4', res == pd.Statement.lex('P(x())'), str(res))
+res = pd.Statement.lex('(y = x)').complexSubstitute({
+    ('var', '24'): tuple(pd.Statement.lex('(1 + 2)')),
+    ('var', '25'): (('number', '3'),),
+})
+test('Statement.complexSubstitute 5', res == pd.Statement.lex('(3 = (1 + 2))'), str(res))
+
+state = pd.Statement.lex('(P(x, 1) and (exists(y)(y > x)))')
+res = (state.symbolPositions(), state.positionsOf(('number', '1')), state.positionsOf(('var', '1')), state.syms())
+test('Statement.symbolPositions', res == (
+    {('pred', '16'): (1,), ('var', '24'): (3, 16), ('var', '25'): (11, 14)},
+    (5,),
+    (),
+    {('pred', '16'), ('var', '24'), ('var', '25')},
+), res)
+res = []
+for mutate in (
+    lambda: state.symbolPositions().clear(),
+    lambda: state.seqIndex().positions[('var', '24')].append(99),
+    lambda: state.seqIndex().positions.pop(('var', '24')),
+):
+    try:
+        mutate()
+    except (AttributeError, TypeError):
+        res.append(True)
+    else:
+        res.append(False)
+res = (res, state.syms(), state.positionsOf(('var', '24')))
+test('Statement.symbolPositions read-only', res == (
+    [True, True, True],
+    {('pred', '16'), ('var', '24'), ('var', '25')},
+    (3, 16),
+), res)
+
+state = pd.Statement.lex('((forall(x)(P(x) and (exists(x)Q(x, y)))) and R(x))')
+res = (state.scopes(), state.freeVars(), state.freePositions(('var', '24')), pd.Statement.lex('(P and').scopes())
+test('Statement.scopes', res == (
+    (
+        pd.QuantifierScope('forall', ('var', '24'), 1, 26, (9,)),
+        pd.QuantifierScope('exists', ('var', '24'), 12, 24, (19,)),
+    ),
+    {('var', '24'), ('var', '25')},
+    (29,),
+    None,
+), res)
+res = (
+    state.instantiateFree(('var', '24'), pd.Statement.lex('(y + 1)')),
+    state.instantiateFree(('var', '25'), pd.Statement.lex('(x + 1)')),
+    state.instantiateFree(('var', '25'), pd.Statement.lex('(z + 1)')),
+)
+test('Statement.instantiateFree', tuple(None if x is None else str(x) for x in res) == (
+    '((forall(x)(P(x) and (exists(x)Q(x,y)))) and R((y+1)))',
+    None,
+    '((forall(x)(P(x) and (exists(x)Q(x,(z+1))))) and R(x))',
+), tuple(None if x is None else str(x) for x in res))
+state = pd.Statement.lex(
+    ''.join('(forall(x_{})'.format(i) for i in range(2000)) +
+    'P(y' + ''.join(', x_{}'.format(i) for i in range(2000)) + ')' + ')' * 2000
+)
+res = (state.freeVars(), state.freePositions(('distVar', '1999')), state.freePositions(('var', '25')), len(state.scopes()))
+test('Statement.freeVars many binders', res == ({('var', '25')}, (), (2000 * 5 + 2,), 2000), res)
+
+state = pd.Statement.lex('((forall([health])([health](x) > 1)) and P(x))')
+res = (
+    state.instantiateFree(('var', '24'), pd.Statement.lex('[health](2)')),
+    pd.Statement.lex('([health](x) > y)').freeVars(),
+)
+test('Statement.instantiateFree game function', res == (
+    None,
+    {('gameFuncName', '[health]'), ('var', '24'), ('var', '25')},
+), res)
+
+res = pd.Statement.lex('(P(x) and [health](x))').rewrite({('var', '24'): (('number', '1'),)}, validate=False)
+test('Statement.rewrite', (str(res), res.wellformedKind()) == ('(P(1) and [health](1))', False), (str(res), res.wellformedKind()))
+
+res = pd.Statement.lex('(P(x) and (exists(y)(y > x)))').instantiateMany(
+    ('var', '24'),
+    (pd.Statement.lex(x) for x in ('1', '(z + 2)', 'P', 'x, y'))
+)
+test('Statement.instantiateMany 1', tuple(None if x is None else str(x) for x in res) == (
+    '(P(1) and (exists(y)(y>1)))',
+    '(P((z+2)) and (exists(y)(y>(z+2))))',
+    None,
+    None,
+), tuple(None if x is None else str(x) for x in res))
+res = pd.Statement.lex('(forall(x)P(x))').instantiateMany(('var', '24'), (pd.Statement.lex('1'),))
+test('Statement.instantiateMany 2', res == (None,), res)
 
 res = pd.Statement.lex('([ATK](P(x)) and (forall(y_1)( Q_3(y_1, 5) )))').symbolPoint()
 test('Statement.symbolPoint', res == 8+1+1+1+2+2+2+2+1, res)
 
+res = pd.StatementBuilder().quanti('forall', ('var', '24')).open() \
+    .add(pd.Statement.lex('P(x)')).connect('imply') \
+    .function(('pred', '17'), (('var', '24'), pd.Statement.lex('(1 + 2)'))).close(2).build()
+test('StatementBuilder', tuple(res) == tuple(pd.Statement.lex('(forall(x)(P(x) imply Q(x, (1 + 2))))')), str(res))
+
 res = pd.Statement.lex('f(455, 4333, (76 + 5))').functionArgs()
 test('Statement.functionArgs 1',
      res == tuple(pd.Statement.lex(arg) for arg in ('455', '4333', '(76 + 5)')),
@@ -315,6 +526,30 @@ test('Statement.deterministic 7', not res, True)
 res = pd.Statement.lex('[chosenPlayer](f(3, 4, 5))').deterministic(obj=True)
 test('Statement.deterministic 8', not res, True)
 
+state = pd.Statement.lex('((forall(x)(exists(y)P(x, y))) and [ATK](3, (1 + [health](2))))')
+attributes = state.attributes()
+left, right = state.operatorArgs()
+argAttributes = right.functionArgs()[1].attributes()
+res = (
+    (attributes.obj, attributes.deterministic, attributes.symbolPoint, attributes.quantifierDepth, len(state.syms())),
+    (state.symsIn(left.start, left.end), state.symsIn(right.start, right.end)),
+    (left.attributes().quantifierDepth, right.attributes().deterministic, right.attributes().simple),
+    (argAttributes.obj, argAttributes.deterministic, argAttributes.simple, argAttributes.deterministicAny),
+    right._attributeTable is state._attributeTable,
+    pd.Statement.lex('(P and').attributes(),
+)
+test('Statement.attributes', res == (
+    (False, False, 26, 2, 5),
+    (
+        {('var', '24'), ('var', '25'), ('pred', '16')},
+        {('predAFuncName', '[ATK]'), ('gameFuncName', '[health]')},
+    ),
+    (2, True, False),
+    (True, True, False, True),
+    True,
+    None,
+), res)
+
 res = pd.Statement.lex('((5 + 6) = 4)').operatorArgs()
 if res is None: res = ('err',)
 test('Statement.operatorArgs 1', res == (pd.Statement.lex('(5 + 6)'), pd.Statement.lex('4')), tuple(str(ree) for ree in res))
@@ -347,6 +582,444 @@ res = pd.Statement.lex('P(1, 2)').operatorArgs()
 if res is None: res = ('right',)
 test('Statement.operatorArgs 8', res == ('right',), tuple(str(ree) for ree in res))
 
+res = str(pd.Statement.lex('(forall(x_1)([ATK]($player:2$, (5 f/ y)) or not tF))', special=True))
+test('Statement.__str__', res == '(forall(x_1)([ATK]($player:2$,(5f/y)) or not tF))', res)
+
+res = pd.Statement.lex('(forall(x)(P(x, (1 + y)) imply (x = 2)))').syntaxTree()
+test('Statement.syntaxTree 1',
+    res.kind == pd.NodeKind.QUANTIFIER and not res.obj and (res.start, res.end, res.head) == (0, 24, 1) and
+    res.children[0].kind == pd.NodeKind.CONNECTIVE and (res.children[0].start, res.children[0].end) == (5, 23) and
+    tuple(node.kind for node in res.children[0].children) == (pd.NodeKind.FUNCTION, pd.NodeKind.EQUALITY) and
+    tuple(node.kind for node in res.children[0].children[0].children) == (pd.NodeKind.ATOM, pd.NodeKind.OPERATOR),
+    res
+)
+res = pd.Statement.lex('(P(x) and (x + 1))').syntaxTree()
+test('Statement.syntaxTree 2', res is None, res)
+
+#Frozen copy of the well-formedness checks of the original Statement, for differential testing.
+#Method bodies are verbatim, only the class is renamed.
+@dataclass
+class BaselineStatement:
+    statement: Tuple[Tuple, ...]
+
+    def __getitem__(self, key):
+        return self.statement[key]
+
+    def __len__(self):
+        return len(self.statement)
+
+    def eq(self, statement: 'BaselineStatement', startingMaps = None) -> Tuple[bool, dict[Tuple, Tuple] | None]:
+        """
+        Check if two statements are functionally equivalent
+        """
+        if startingMaps == None: startingMaps = {}
+        if not isinstance(statement, BaselineStatement): return (False, None)
+        maps = deepcopy(startingMaps)
+        if len(self) != len(statement):
+            return (False, maps)
+        for sym1, sym2 in zip(self, statement):
+            if (sym1[0] in varSymbols and sym2[0] in varSymbols) or \
+            (sym1[0] in predSymbols and sym2[0] in predSymbols):
+                if sym1 in maps:
+                    if maps[sym1] != sym2:
+                        return (False, maps)
+                    else: continue
+                else:
+                    maps[sym1] = sym2
+                    continue
+            elif sym1 != sym2:
+                return (False, maps)
+        return (mappableDict(maps), maps)
+
+    def __eq__(self, statement: 'BaselineStatement', maps = None) -> bool:
+        if maps is None: maps = {}
+        return self.eq(statement, maps)[0]
+
+    def form(
+            self,
+            start: Tuple[Tuple, ...]=(),
+            end: Tuple[Tuple, ...]=(),
+            mid: Tuple[Tuple, ...]=(),
+            startingMaps: dict[Tuple, Tuple]={},
+            opt1obj: bool = False,
+            opt2obj: bool = False
+        ) -> bool:
+        """
+        Checks if the statement form fits the statement.
+        """
+
+        #Check form first
+        if not checkSeqForm(
+            self,
+            start,
+            end,
+            mid,
+            startEndMatch=lambda x, y: BaselineStatement(x) == BaselineStatement(y)
+        ): return False
+
+        #Prepare maps
+        maps = deepcopy(startingMaps)
+        startEndIndexes = seqFormOptionalsIndexes(
+            self,
+            start,
+            end,
+            mid,
+            startEndMatch=lambda x, y: BaselineStatement(x) == BaselineStatement(y)
+        )[0]
+        check = BaselineStatement(self[:startEndIndexes[0]]).eq(BaselineStatement(start), startingMaps=maps)
+        if not check[0]: return False
+        maps = check[1]
+        check = BaselineStatement(self[startEndIndexes[1]:]).eq(BaselineStatement(end), startingMaps=maps)
+        if not check[0]: return False
+        maps = check[1]
+
+        if opt1obj: opt1wellmethod = 'wellformedobj'
+        else: opt1wellmethod = 'wellformed'
+
+        #Check for special case mid
+        if mid:
+            if opt2obj: opt2wellmethod = 'wellformedobj'
+            else: opt2wellmethod = 'wellformed'
+            minIndexes = seqFormOptionalsIndexes(self, start, end, mid, midcond=lambda index: \
+                        getattr(BaselineStatement(self[startEndIndexes[0]:index]), opt1wellmethod)() and \
+                        getattr(BaselineStatement(self[index+len(mid):startEndIndexes[1]]), opt2wellmethod)() \
+            , startEndMatch=lambda x, y: BaselineStatement(x) == BaselineStatement(y))[1]
+            for minIndex in minIndexes:
+                if self[minIndex[0] : minIndex[1]] == mid:
+                    return True
+            return False
+        if not getattr(BaselineStatement(self[startEndIndexes[0]:startEndIndexes[1]]), opt1wellmethod)():
+            return False
+
+        #All filters passed - great!
+        return True
+
+    def wellformedobj(self) -> bool:
+        """
+        Check whether the object is well-formed.
+        """
+
+        if len(self) == 0: return False
+        if len(self) == 1:
+            return self.statement[0][0] in varFuncSymbols
+        if len(self) > 2:
+            #Function syntax
+            if self[1] == ('bracket', '(') and self[-1] == ('bracket', ')') and \
+            self[0][0] in varFuncSymbols:
+                paramsLeft = self[2:-1]
+                while len(paramsLeft) > 0:
+                    paramEndIndex = next(
+                        (
+                            index for index in range(len(paramsLeft) + 1)
+                            if BaselineStatement(paramsLeft[:index]).wellformedobj() and \
+                            not (index < len(paramsLeft) and not paramsLeft[index] == ('comma',))
+                        ),
+                        None
+                    )
+                    if paramEndIndex is None: return BaselineStatement(paramsLeft).wellformedobj()
+                    paramsLeft = paramsLeft[paramEndIndex+1:]
+                return True
+
+            #Operator syntax
+            elif self.form((
+                ('bracket', '('),
+            ), (
+                ('bracket', ')'),
+            ), (
+                ('oper', '+'),
+            ),
+            opt1obj=True,
+            opt2obj=True,
+            ): return True
+            elif self.form((
+                ('bracket', '('),
+            ), (
+                ('bracket', ')'),
+            ), (
+                ('oper', '-'),
+            ),
+            opt1obj=True,
+            opt2obj=True,
+            ): return True
+            elif self.form((
+                ('bracket', '('),
+            ), (
+                ('bracket', ')'),
+            ), (
+                ('oper', '*'),
+            ),
+            opt1obj=True,
+            opt2obj=True,
+            ): return True
+            elif self.form((
+                ('bracket', '('),
+            ), (
+                ('bracket', ')'),
+            ), (
+                ('oper', '/'),
+            ),
+            opt1obj=True,
+            opt2obj=True,
+            ): return True
+            elif self.form((
+                ('bracket', '('),
+            ), (
+                ('bracket', ')'),
+            ), (
+                ('oper', 'f/'),
+            ),
+            opt1obj=True,
+            opt2obj=True,
+            ): return True
+            elif self.form((
+                ('bracket', '('),
+            ), (
+                ('bracket', ')'),
+            ), (
+                ('oper', 'c/'),
+            ),
+            opt1obj=True,
+            opt2obj=True,
+            ): return True
+            elif self.form((
+                ('bracket', '('),
+            ), (
+                ('bracket', ')'),
+            ), (
+                ('oper', '%'),
+            ),
+            opt1obj=True,
+            opt2obj=True,
+            ): return True
+        return False
+
+    def wellformed(self) -> bool:
+        """
+        Check whether the statement is well-formed.
+        """
+
+        if len(self) == 0: return False
+        if len(self) == 1:
+            return self[0][0] in predSymbols
+
+        #For All syntax
+        if self.form(
+            (
+                ('bracket', '('),
+                ('quanti', 'forall'),
+                ('bracket', '('),
+                ('var', '0'),
+                ('bracket', ')'),
+            ),
+            (
+                ('bracket', ')'),
+            ),
+        ): return True
+
+        #Exists syntax
+        if self.form(
+            (
+                ('bracket', '('),
+                ('quanti', 'exists'),
+                ('bracket', '('),
+                ('var', '0'),
+                ('bracket', ')'),
+            ),
+            (
+                ('bracket', ')'),
+            ),
+        ): return True
+
+        #Not syntax
+        if self.form(
+            (
+                ('bracket', '('),
+                ('connect', 'not'),
+            ),
+            (
+                ('bracket', ')'),
+            ),
+        ): return True
+
+        #And syntax
+        if self.form(
+            (
+                ('bracket', '('),
+            ),
+            (
+                ('bracket', ')'),
+            ),
+            (
+                ('connect', 'and'),
+            ),
+        ): return True
+
+        #Or syntax
+        if self.form(
+            (
+                ('bracket', '('),
+            ),
+            (
+                ('bracket', ')'),
+            ),
+            (
+                ('connect', 'or'),
+            ),
+        ): return True
+
+        #Imply syntax
+        if self.form(
+            (
+                ('bracket', '('),
+            ),
+            (
+                ('bracket', ')'),
+            ),
+            (
+                ('connect', 'imply'),
+            ),
+        ): return True
+
+        #Equal syntax
+        if self.form(
+            (
+                ('bracket', '('),
+            ),
+            (
+                ('bracket', ')'),
+            ),
+            (
+                ('equal',),
+            ),
+            opt1obj=True,
+            opt2obj=True,
+        ): return True
+
+        #Comparator syntax
+        if self.form(
+            (
+                ('bracket', '('),
+            ),
+            (
+                ('bracket', ')'),
+            ),
+            (
+                ('compare', '<'),
+            ),
+            opt1obj=True,
+            opt2obj=True,
+        ): return True
+
+        if self.form(
+            (
+                ('bracket', '('),
+            ),
+            (
+                ('bracket', ')'),
+            ),
+            (
+                ('compare', '>'),
+            ),
+            opt1obj=True,
+            opt2obj=True,
+        ): return True
+
+        #Function syntax
+        if self[1] == ('bracket', '(') and self[-1] == ('bracket', ')') and \
+        self[0][0] in ('predGFuncName', 'predAFuncName', 'distPred', 'pred'):
+            paramsLeft = self[2:-1]
+            while len(paramsLeft) > 0:
+                paramEndIndex = next(
+                    (
+                        index for index in range(len(paramsLeft) + 1)
+                        if BaselineStatement(paramsLeft[:index]).wellformedobj() and \
+                        not (index < len(paramsLeft) and not paramsLeft[index] == ('comma',))
+                    ),
+                    None
+                )
+                if paramEndIndex is None: return BaselineStatement(paramsLeft).wellformedobj()
+                paramsLeft = paramsLeft[paramEndIndex+1:]
+            return True
+
+        return False
+
+rng = random.Random(15)
+pool = tuple({token for rule in pd.baseRules for token in rule}) + (('comma',), ('connect', 'not'), ('player', '1'), ('truth', 'tF'))
+cases = []
+for rule in tuple(pd.baseRules) + tuple(pd.Statement.lex(string) for string in (
+    '[ATK]([randPlayer](1), (x f/ [health](y, 2,)))', '(not (P and (x = y_2)))', '(exists([power])(x < (1 c/ y)))'
+)):
+    tokens = tuple(rule)
+    cases.append(tokens)
+    for _ in range(8):
+        start = rng.randrange(len(tokens))
+        cases.append(tokens[start:rng.randrange(start, len(tokens)) + 1])
+        mutated = list(tokens)
+        mutated[rng.randrange(len(mutated))] = rng.choice(pool)
+        cases.append(tuple(mutated))
+res = [
+    str(pd.Statement(tokens)) for tokens in cases
+    if (pd.Statement(tokens).wellformed(), pd.Statement(tokens).wellformedobj()) != \
+    (BaselineStatement(tokens).wellformed(), BaselineStatement(tokens).wellformedobj())
+]
+test('Statement.wellformed differential', not res and len(cases) > 500, ':print:\n' + '\n'.join(res))
+
+res = pd.Statement.lex('(not ' * 3000 + 'P(' + '[health](' * 3000 + 'x' + ')' * 6001)
+test('Statement.wellformed deep', res.wellformed() and not res.wellformedobj() and res.wellformedKind() is False, len(res))
+
+state = pd.Statement.lex('(' * 3000 + 'P' + ''.join(' and Q_{}(x_{}))'.format(i, i) for i in range(3000)))
+res = state.syntaxTree()
+test('Statement.syntaxTree deep', (res.kind, res.end, res.children[1].start) == (pd.NodeKind.CONNECTIVE, len(state), len(state) - 5), res.kind)
+left, right = state.operatorArgs()
+res = (state.deterministic(), state.simple(), state.attributes().quantifierDepth, len(left.operatorArgs()), str(right))
+test('Statement.attributes deep', res == (False, False, 0, 2, 'Q_2999(x_2999)'), res)
+
+state = pd.Statement.lex('(' * 4000 + 'P' + ''.join(' and Q_{}(x_{}))'.format(i, i) for i in range(4000)))
+tracemalloc.start()
+state.deterministic()
+peak = tracemalloc.get_traced_memory()[1]
+tracemalloc.stop()
+res = (len(state._attributeTable), len(state.symsIn(0, len(state))), peak < 16 * 2 ** 20)
+test('Statement.attributes size', res == (3 * 4000 + 1, 2 * 4000 + 1, True), (res, peak))
+
+res = {pd.Statement.lex('(P(x) and Q)'), pd.Statement.lex('(Q(y) and P)'), pd.Statement.lex('(P(x) or Q)')}
+test('Statement.__hash__', len(res) == 2 and pd.Statement.lex('(R(z) and S)') in res, tuple(str(state) for state in res))
+
+state = pd.Statement(list(pd.Statement.lex('P(x)')))
+try:
+    state.statement = ()
+except AttributeError:
+    res = (type(state.statement), deepcopy(state) is state)
+else:
+    res = 'mutated'
+test('Statement frozen', res == (tuple, True), res)
+
+first = pd.Statement.lex('(P(x) and Q)').intern()
+second = pd.Statement((pd.Statement.lex('(P(x) and Q)') + pd.Statement(())).statement).intern()
+third = pd.Statement.lex('(Q and P(x))').intern()
+res = (first is second, third[1] is first[6], pd.internedCount()[1] > 0)
+test('Statement.intern', res == (True, True, True), res)
+table = pd.setTokenTableSize(2)
+for string in ('1', '2', '3', '1'):
+    pd.internToken(('number', string))
+res = (len(table), pd.internedCount()[0], table.stats()['evictions'])
+pd.setTokenTableSize()
+test('setTokenTableSize', res == (2, 2, 2), res)
+
+state = pd.Statement.lex('P(x, (y + 1))')
+args = state.functionArgs()
+left, right = args[1].operatorArgs()
+res = (type(right).__name__, right.buffer is state.statement, (right.start, right.end), right[0], args[1][1:3], str(args[1]), right == pd.Statement.lex('1'))
+test('StatementView', res == ('StatementView', True, (7, 8), ('number', '1'), (('var', '25'), ('oper', '+')), '(y+1)', True), res)
+
+res = pd.Statement.lex('(P(x, y_1) and P(x, [health]))').canonical()
+test('Statement.canonical', res == (
+    ('bracket', '('), ('canonPred', 0), ('bracket', '('), ('canonVar', 1), ('comma',), ('canonVar', 2), ('bracket', ')'),
+    ('connect', 'and'),
+    ('canonPred', 0), ('bracket', '('), ('canonVar', 1), ('comma',), ('canonVar', 3), ('bracket', ')'),
+    ('bracket', ')'),
+) and pd.Statement.lex('(Q(y, z) and Q(y, x_2))').canonical() == res, res)
+
 res = pd.Statement.lex('(5 = 4)').operatorSymbol()
 test('Statement.operatorSymbol 1', res == ('equal',), res)
 
@@ -359,6 +1032,90 @@ test('Statement.operatorSymbol 3', res == ('compare', '>'), res)
 res = pd.Statement.lex('(P imply (P and Q))').operatorSymbol()
 test('Statement.operatorSymbol 4', res == ('connect', 'imply'), res)
 
+text = """
+>Thé title ~not a statement~
+~(x > 1)~ ~P~
+>>Title 2
+~(not
+    Q(y))~
+"""
+res = tuple((rule.statement, tuple(state)) for rule, state in pd.readStatements(io.BytesIO(text.encode()), chunkSize=3))
+test('readStatements', res == (
+    ('(x > 1)', tuple(pd.Statement.lex('(x > 1)'))),
+    ('P', tuple(pd.Statement.lex('P'))),
+    ('(not\n    Q(y))', tuple(pd.Statement.lex('(not Q(y))'))),
+), res)
+
+with tempfile.TemporaryDirectory() as tempDir:
+    rulesPath = os.path.join(tempDir, 'rules.txt')
+    with open(rulesPath, 'w', encoding='utf-8') as f:
+        f.write('>Rules\n~(x > 1)~ ~P~\n')
+    first = pd.loadBaseRules(rulesPath)
+    compiled = os.path.exists(os.path.join(tempDir, 'rules.pwrc'))
+    second = pd.loadBaseRules(rulesPath)
+    with open(rulesPath, 'w', encoding='utf-8') as f:
+        f.write('>Rules\n~Q(y)~\n')
+    third = pd.loadBaseRules(rulesPath)
+    res = (compiled, first == second, tuple(map(str, first)), tuple(map(str, third)))
+test('loadBaseRules', res == (True, True, ('(x>1)', 'P'), ('Q(y)',)), res)
+
+with tempfile.TemporaryDirectory() as tempDir:
+    rulesPath = os.path.join(tempDir, 'rules.txt')
+    with open(rulesPath, 'w', encoding='utf-8') as f:
+        f.write('>Rules\n~P~\n')
+    os.mkdir(os.path.join(tempDir, 'rules.pwrc'))
+    res = (tuple(map(str, pd.loadBaseRules(rulesPath))), sorted(os.listdir(tempDir)))
+test('loadBaseRules failed write', res == (('P',), ['rules.pwrc', 'rules.txt']), res)
+
+digest = pd.statement._compiledRulesDigest(b'~P~')
+pd.statement.lexerVersion += 1
+res = pd.statement._compiledRulesDigest(b'~P~') != digest
+pd.statement.lexerVersion -= 1
+test('loadBaseRules lexerVersion', res and pd.statement._compiledRulesDigest(b'~P~') == digest, res)
+
+text = """>>Numbers
+>Addition
+~P~ ~(x
+  + y)~
+>Order
+~Q~
+>>Players
+~R~
+"""
+results = br.parse(text)
+res = tuple((rule.statement, tuple(rule.titles), rule.start, rule.end) for rule in results)
+test('baserules.parse', res == (
+    ('P', ('Numbers', 'Addition'), (3, 1), (3, 3)),
+    ('(x\n  + y)', ('Numbers', 'Addition'), (3, 5), (4, 7)),
+    ('Q', ('Numbers', 'Order'), (6, 1), (6, 3)),
+    ('R', ('Players',), (8, 1), (8, 3)),
+) and results == list(br.iterParse(text.encode(), chunkSize=2)), res)
+res = {titles: [rule.statement for rule in rules] for titles, rules in br.indexSections(results).items()}
+test('baserules.indexSections', res == {
+    (): ['P', '(x\n  + y)', 'Q', 'R'],
+    ('Numbers',): ['P', '(x\n  + y)', 'Q'],
+    ('Numbers', 'Addition'): ['P', '(x\n  + y)'],
+    ('Numbers', 'Order'): ['Q'],
+    ('Players',): ['R'],
+}, res)
+
+loads = []
+lazy = pd.LazySequence(lambda: loads.append(None) or ('a', 'b'))
+res = (lazy.loaded, len(lazy), lazy[1], list(lazy), len(loads))
+lazy.reset()
+res += (lazy.loaded, tuple(lazy), len(loads))
+test('LazySequence', res == (False, 2, 'b', ['a', 'b'], 1, False, ('a', 'b'), 2), res)
+
+with tempfile.TemporaryDirectory() as tempDir:
+    rulesPath = os.path.join(tempDir, 'rules.txt')
+    with open(rulesPath, 'w', encoding='utf-8') as f:
+        f.write('~P~\n')
+    pd.setBaseRulesPath(rulesPath)
+    res = (pd.baseRules.loaded, tuple(map(str, pd.baseRules)))
+    pd.setBaseRulesPath(None)
+res += (pd.baseRules.loaded, len(pd.baseRules) > 1)
+test('setBaseRulesPath', res == (False, ('P',), False, True), res)
+
 res = [(i, state) for i, state in enumerate(pd.baseRules) if not state.wellformed()]
 test('baseRules', not res, ':print:\n' + '\n'.join(f'{i}: {x}' for i, x in res))
 
@@ -640,6 +1397,25 @@ test('Proof.inferConclusions CondProof 2', set(tuple(state) for state in res) ==
     tuple(str(ree) for ree in res)
 )
 
+res = io.StringIO()
+proof.write(res)
+test('Proof.write', res.getvalue() == """0. (forall(x)(P(x) and Q))
+Subproof 0:
+    0. (forall(x)(P(x) and Q))
+    1. (P(x) and Q)
+    2. P(x)
+    3. (forall(x)P(x))
+""", ':print:' + res.getvalue())
+
+res = {
+    pd.ProofBase.convert(('P(x)', 'Q(x)')).canonical(),
+    pd.ProofBase.convert(('R(y)', 'P(y)')).canonical(),
+    pd.ProofBase.convert(('P(x)', 'Q(y)')).canonical(),
+}
+test('ProofBase.canonical', len(res) == 2 and proof.canonical() == pd.Proof.convert(
+    ('(forall(y)(Q(y) and P))',), ( ('(forall(y)(Q(y) and P))', ((0, None, 'y', '(Q(y) and P)'), (1, None, '', 'Q(y)'), (2, 0, '', '(forall(y)Q(y))'))) ,)
+).canonical(), res)
+
 proof = pd.Proof.convert(('(1=1)',), ( ('(forall(x)(P(x) and  (not P(x) )))', (
     (0, None, 'x', '(P(x) and (not P(x)))'),
     (1, None, '', 'P(x)'),
@@ -914,6 +1690,8 @@ res = game.convert(pd.Statement.lex('(x + $player:0$)', special=True), inst, Tru
 test('PWars.convert 2', tuple(res) == pd.Statement.lex('(x + [chosenPlayer](13))').statement, str(res))
 res = game.convert(pd.Statement.lex('((x + $player:2$) - $card:0$)', special=True), inst, True)
 test('PWars.convert 3', tuple(res) == pd.Statement.lex('((x + [chosenPlayer](0)) - [chosenCard](0))').statement, str(res))
+res = game.convert(pd.Statement.lex('[HEAL]($player:5$)', special=True), pw.CalcInstance(randomPlayer={3: 5}), True)
+test('PWars.convert 4', tuple(res) == pd.Statement.lex('[HEAL]([randPlayer](3))').statement, str(res))
 ################################################################calcInstance end
 game.advance()
 res = game.currentGameStates()
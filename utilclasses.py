@@ -12,7 +12,10 @@
 
 # You should have received a copy of the GNU General Public License along
 # with Predicate Wars. If not, see <https://www.gnu.org/licenses/>.
-from typing import Any, Callable
+from collections import OrderedDict
+from collections.abc import Sequence
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Iterator
 
 class LazyDict(dict):
     """
@@ -27,3 +30,92 @@ class LazyDict(dict):
         except KeyError:
             super().__setitem__(__key, self.generation(__key))
             return super().__getitem__(__key)
+
+class LRUCache:
+    """
+    Bounded mapping that evicts least recently used pairs when full.
+    Counts hits, misses and evictions for sizing.
+    """
+    def __init__(self, maxsize: int = 1024):
+        if maxsize < 1:
+            raise ValueError('maxsize must be positive')
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+        }
+    def __len__(self) -> int:
+        return len(self._data)
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+class LazySequence(Sequence):
+    """
+    Read-only sequence whose items are loaded on first access.
+    """
+    def __init__(self, loader: Callable[[], Sequence]):
+        self.loader = loader
+        self._items = None
+        self._lock = Lock()
+    @property
+    def loaded(self) -> bool:
+        return self._items is not None
+    def materialize(self) -> tuple:
+        items = self._items
+        if items is None:
+            with self._lock:
+                if self._items is None:
+                    self._items = tuple(self.loader())
+                items = self._items
+        return items
+    def reset(self) -> None:
+        """
+        Drops loaded items so the next access loads them again.
+        """
+        with self._lock:
+            self._items = None
+    def __getitem__(self, index):
+        return self.materialize()[index]
+    def __len__(self) -> int:
+        return len(self.materialize())
+    def __iter__(self) -> Iterator:
+        return iter(self.materialize())
+    def __contains__(self, item: Any) -> bool:
+        return item in self.materialize()
+    def __repr__(self) -> str:
+        if self._items is None:
+            return f'{type(self).__name__}(<not loaded>)'
+        return f'{type(self).__name__}({self._items!r})'